@@ -1,10 +1,9 @@
 import datetime
+import hashlib
 
 import streamlit as st
 import io
 import plotly.express as px
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 
 from streamlit_extras.metric_cards import style_metric_cards
@@ -12,27 +11,46 @@ from streamlit_extras.chart_container import chart_container
 from streamlit_extras.switch_page_button import switch_page
 from streamlit_extras.app_logo import add_logo
 
-from prophet import Prophet
+from forecast import get_forecast, available_engines
 
 from channelDataExtraction import getChannelData
 from channelVideoDataExtraction import *
+from channelSync import syncChannelVideos, loadChannelStore, storeVersion
+from title_search import TitleIndex
+from video_schema import for_plotting, format_count
+from video_query import VideoQueryEngine
+from quotaScheduler import QuotaExceeded, quotaReport
+from responseCache import cacheStats
+from googleapiclient.errors import HttpError
 
 
 ########################################################################################################################
 #                                               FUNCTIONS
 ########################################################################################################################
 @st.cache_data
-def download_data(api_key, channel_id):
-    channel_details = getChannelData(api_key, channel_id)
-
-    # check if bad channel id
-    if channel_details is None:
-        return None, None, None, None
+def download_data(api_key, channel_id, store_version=None, sync=False):
+    """Loads a channel from its store, syncing it through the API only when asked to or never synced.
+
+    store_version (see storeVersion) is part of the cache key, so a store rewritten by the
+    ingest worker is picked up on the next run without calling the API.
+    """
+    store = None if sync or store_version is None else loadChannelStore(channel_id)
+
+    if store is not None and store["channel_details"] is not None:
+        channel_details = store["channel_details"]
+        videos, all_video_data = store["videos"], store["video_data"]
+    else:
+        # a refresh asks the API for the current channel statistics even if they are cached
+        channel_details = getChannelData(api_key, channel_id, revalidate=sync)
+
+        # check if bad channel id
+        if channel_details is None:
+            return None, None, None, None
 
-    videos = getVideoList(api_key, channel_details["uploads"])
+        # only new uploads and a slice of older videos are fetched once the channel has been synced
+        videos, all_video_data = syncChannelVideos(api_key, channel_id, channel_details["uploads"],
+                                                   channel_details=channel_details)
     videos_df = pd.DataFrame(videos)
-    video_ids = [video['id'] for video in videos if video['id'] is not None]
-    all_video_data = buildVideoListDataframe(api_key, video_ids)
 
     st.session_state.start_index = 0
     st.session_state.end_index = 10
@@ -44,8 +62,50 @@ def download_data(api_key, channel_id):
     return channel_details, videos, all_video_data, videos_df
 
 
-def display_video_list(video_data, start_index, end_index, search_query=None):
-    """Displays a list of videos in a tabular format with custom column order and buttons."""
+@st.cache_resource(max_entries=8)
+def load_query_engine(channel_id, synced_at, _video_data):
+    """Builds the date, tag and top-N query engine once per synced dataset, shared across sessions."""
+    return VideoQueryEngine(_video_data)
+
+
+@st.cache_resource(max_entries=8)
+def load_title_index(channel_id, synced_at, _videos):
+    """Builds the title search index once per synced dataset."""
+    return TitleIndex([video['title'] for video in _videos])
+
+
+def tag_frequencies(tags):
+    """Counts how many videos use each tag, with one explode and value_counts."""
+    return tags.explode().dropna().astype(str).str.strip().loc[lambda tag: tag != ""].value_counts()
+
+
+@st.cache_data(max_entries=32)
+def load_tag_frequencies(channel_id, synced_at, filters, _tags):
+    """Tag counts of the filtered videos and their content hash, once per dataset and filters."""
+    frequencies = tag_frequencies(_tags)
+    frequency_hash = hashlib.sha256(pd.util.hash_pandas_object(frequencies).values.tobytes()).hexdigest()
+    return frequencies, frequency_hash
+
+
+@st.cache_data(max_entries=32)
+def render_word_cloud(frequency_hash, filters, _frequencies):
+    """Renders the tag word cloud to PNG bytes, cached per frequency table and filters."""
+    # imported here so the rest of the page renders without loading it
+    from wordcloud import WordCloud
+
+    wordcloud = WordCloud(width=800, height=400, background_color='black') \
+        .generate_from_frequencies(_frequencies.to_dict())
+
+    buf = io.BytesIO()
+    wordcloud.to_image().save(buf, format="png")
+    return buf.getvalue()
+
+
+def display_video_list(video_data, start_index, end_index, search_query=None, title_index=None):
+    """Displays a list of videos in a tabular format with custom column order and buttons.
+
+    title_index is the TitleIndex built over video_data; one is built here if not given.
+    """
 
     # Input widget for searching videos by title
     if search_query is None:
@@ -63,11 +123,14 @@ def display_video_list(video_data, start_index, end_index, search_query=None):
         st.session_state.start_index = start_index
         st.session_state.end_index = end_index
 
-    # Filter videos based on the search query across the entire video_data list
-    filtered_videos = [video for video in video_data if new_search_query.lower() in video['title'].lower()]
+    # Ranked, typo tolerant matches for the search query; later pages reuse the ranked result
+    if title_index is None:
+        title_index = TitleIndex([video['title'] for video in video_data])
+    page_positions, total_matches = title_index.search(new_search_query, st.session_state.start_index,
+                                                       st.session_state.end_index - st.session_state.start_index)
 
     # Paginate the filtered results
-    paginated_videos = filtered_videos[st.session_state.start_index:st.session_state.end_index]
+    paginated_videos = [video_data[position] for position in page_positions]
 
     for video in paginated_videos:
         col1, col2, col3, col4 = st.columns(4)
@@ -84,7 +147,7 @@ def display_video_list(video_data, start_index, end_index, search_query=None):
                 switch_page("video_data")
 
     # Display a button to load the next 10 search results
-    if st.session_state.end_index < len(filtered_videos):
+    if st.session_state.end_index < total_matches:
         if st.button('Load next 10 videos', key='load_next'):
             st.session_state.start_index = st.session_state.end_index
             st.session_state.end_index += 10
@@ -125,29 +188,45 @@ if not st.session_state.API_KEY or not st.session_state.CHANNEL_ID:
 # Data Refresh Button
 refresh_button = st.sidebar.button("Refresh Data")
 
-# First Data Load
-channel_details, videos, all_video_data, videos_df = download_data(st.session_state.API_KEY, st.session_state.CHANNEL_ID)
+try:
+    # First Data Load, from the store kept up to date by the ingest worker when there is one
+    channel_details, videos, all_video_data, videos_df = download_data(st.session_state.API_KEY,
+                                                                       st.session_state.CHANNEL_ID,
+                                                                       storeVersion(st.session_state.CHANNEL_ID))
 
-if channel_details is None:
-    st.warning("Invalid YouTube Channel ID. Please check and enter a valid Channel ID.")
+    if channel_details is None:
+        st.warning("Invalid YouTube Channel ID. Please check and enter a valid Channel ID.")
+        st.stop()
+
+    if refresh_button:
+        with st.spinner("Refreshing data..."):
+            # drop the cached result so the channel is synced again
+            download_data.clear()
+            channel_details, videos, all_video_data, videos_df = download_data(st.session_state.API_KEY,
+                                                                               st.session_state.CHANNEL_ID,
+                                                                               sync=True)
+
+            if channel_details is None:
+                st.warning("Invalid YouTube Channel ID. Please check and enter a valid Channel ID.")
+                st.stop()
+
+except QuotaExceeded as error:
+    st.error(f"{error} Please try again after the quota resets at midnight Pacific time.")
+    st.stop()
+except HttpError as error:
+    st.error(f"The YouTube API returned an error: {error.reason}")
     st.stop()
 
-if refresh_button:
-    with st.spinner("Refreshing data..."):
-        channel_details, videos, all_video_data, videos_df = download_data(st.session_state.API_KEY, st.session_state.CHANNEL_ID)
-
-        if channel_details is None:
-            st.warning("Invalid YouTube Channel ID. Please check and enter a valid Channel ID.")
-            st.stop()
+# API usage for this session
+with st.sidebar.expander("API Quota Usage"):
+    st.dataframe(quotaReport(), hide_index=True)
+    st.caption("Response cache hit rate: {:.0%}".format(cacheStats()["hit_rate"]))
 
 # Data Filters for fine-tuned data selection
 st.sidebar.title("Data Filters")
 
 num_videos = st.sidebar.slider("Select Number of Top Videos to Display:", 1, 50, 10)
 
-# Convert the 'published_date' column to datetime format
-all_video_data['published_date'] = pd.to_datetime(all_video_data['published_date'])
-
 # Extract min and max publish dates
 min_date = all_video_data['published_date'].min().date()  # Ensure it's a date object
 max_date = all_video_data['published_date'].max().date()  # Ensure it's a date object
@@ -160,16 +239,19 @@ if start_date > end_date:
     st.sidebar.warning("Start date should be earlier than end date.")
     st.stop()
 
-tag_search = st.sidebar.text_input("Search Videos by Tag")
-
-date_range_start = pd.Timestamp(start_date)
-date_range_end = pd.Timestamp(end_date)
+tag_search = st.sidebar.text_input("Search Videos by Tag",
+                                   help="Separate tags with commas to require all of them, use | for "
+                                        "either, a leading - to exclude a tag and a trailing * for prefixes, "
+                                        "e.g. python*, tutorial|guide, -shorts")
 
-filtered_data = all_video_data[(all_video_data['published_date'] >= date_range_start) &
-                               (all_video_data['published_date'] <= date_range_end)]
+# published_date is in UTC; the end date includes the whole day
+date_range_start = pd.Timestamp(start_date, tz='UTC')
+date_range_end = pd.Timestamp(end_date, tz='UTC') + pd.Timedelta(days=1)
 
-if tag_search:
-    filtered_data = filtered_data[filtered_data['tags'].apply(lambda x: tag_search in x)]
+# date ranges, tag queries and leaderboards are answered from indexes built once per dataset
+query_engine = load_query_engine(st.session_state.CHANNEL_ID, all_video_data.attrs.get('synced_at'),
+                                 all_video_data)
+filtered_data = all_video_data.iloc[query_engine.select(date_range_start, date_range_end, tag_search)]
 
 ########################################################################################################################
 #                                       CHANNEL DETAILS AREA CONFIGURATION
@@ -186,11 +268,10 @@ with col1:
     add_logo(channel_thumbnail, height=300)
 
     view_count = int(channel_details['viewCount'])
-    subscriber_count = int(channel_details['subscriberCount'])
 
-    # Format view count and subscriber count with commas
+    # Format view count and subscriber count with commas; hidden subscriber counts show as n/a
     view_count_formatted = "{:,}".format(view_count)
-    subscriber_count_formatted = "{:,}".format(subscriber_count)
+    subscriber_count_formatted = format_count(channel_details['subscriberCount'])
 
     st.markdown(f"**Channel Title:** {channel_details['title']}")
     st.markdown(f"**Channel Description:** {channel_details['description']}")
@@ -216,13 +297,13 @@ col1, col2, col3 = st.columns(3)
 # Display statistical graphs for the top videos based on views
 with col1:
     st.subheader(f"Top {num_videos} Videos Based on Views")
-    sorted_video_data = filtered_data.sort_values(by='view_count', ascending=False)
-    # Get the top videos from the sorted DataFrame
-    top_views_df = sorted_video_data.head(num_videos)
+    # Get the top videos by views
+    top_views_df = all_video_data.iloc[query_engine.top('view_count', num_videos,
+                                                        date_range_start, date_range_end, tag_search)]
     with chart_container(top_views_df):
         # Display statistical graphs for the top videos based on views
         # Create a bar chart using Plotly
-        fig = px.bar(top_views_df, x='title', y='view_count')
+        fig = px.bar(for_plotting(top_views_df[['title', 'view_count']]), x='title', y='view_count')
         # Update the layout to rename the axes
         fig.update_layout(xaxis_title="Video Title",
                           yaxis_title="View Count")
@@ -232,14 +313,14 @@ with col1:
 
 with col2:
     st.subheader(f"Top {num_videos} Videos Based on Likes")
-    sorted_video_data = filtered_data.sort_values(by='like_count', ascending=False)
-    # Get the top 10 liked videos from the sorted DataFrame
-    top_likes_df = sorted_video_data.head(num_videos)
+    # Get the top liked videos
+    top_likes_df = all_video_data.iloc[query_engine.top('like_count', num_videos,
+                                                        date_range_start, date_range_end, tag_search)]
 
     with chart_container(top_likes_df):
         # Display statistical graphs for the top 10 videos based on views
         # Create a bar chart using Plotly
-        fig = px.bar(top_likes_df, x='title', y='like_count')
+        fig = px.bar(for_plotting(top_likes_df[['title', 'like_count']]), x='title', y='like_count')
         # Update the layout to rename the axes
         fig.update_layout(xaxis_title="Video Title",
                           yaxis_title="Like Count")
@@ -249,13 +330,13 @@ with col2:
 
 with col3:
     st.subheader(f"Top {num_videos} Based on Comments")
-    sorted_video_data = filtered_data.sort_values(by='comment_count', ascending=False)
-    # Get the top 10 liked videos from the sorted DataFrame
-    top_comments_df = sorted_video_data.head(num_videos)
+    # Get the most commented videos
+    top_comments_df = all_video_data.iloc[query_engine.top('comment_count', num_videos,
+                                                           date_range_start, date_range_end, tag_search)]
     with chart_container(top_comments_df):
         # Display statistical graphs for the top 10 videos based on views
         # Create a bar chart using Plotly
-        fig = px.bar(top_comments_df, x='title', y='comment_count')
+        fig = px.bar(for_plotting(top_comments_df[['title', 'comment_count']]), x='title', y='comment_count')
         # Update the layout to rename the axes
         fig.update_layout(xaxis_title="Video Title",
                           yaxis_title="Comment Count")
@@ -268,7 +349,7 @@ with col3:
 ########################################################################################################################
 
 st.subheader("Viewership Growth Over Time", divider="green")
-views = filtered_data['view_count']
+views = for_plotting(filtered_data['view_count'])
 dates = filtered_data['published_date']
 
 # Creating a time series plot using Plotly
@@ -287,31 +368,20 @@ st.plotly_chart(fig, use_container_width=True)
 
 st.subheader("Predicted Viewership Growth Over Time", divider="green")
 
-with st.spinner("Predicting Views for the next Week"):
-    # Prepare dataframe for Prophet
-    forecast_df = all_video_data[['published_date', 'view_count']]
-    forecast_df.columns = ['ds', 'y']
-
-    # Initialize the Prophet model
-    model = Prophet(
-        yearly_seasonality=False,
-        weekly_seasonality=True,
-        daily_seasonality=True,
-        seasonality_mode='additive')
-
-    # Fit the model with the data
-    model.fit(forecast_df)
-
-    # Dataframe for future dates
-    future_dates = model.make_future_dataframe(periods=30)
+forecast_engine = st.radio("Forecast Engine", available_engines(), horizontal=True,
+                           help="smoothing fits in well under a second; prophet is slower and optional")
 
-    # Predict views for the future dates
-    forecast = model.predict(future_dates)
-    # Plot the original data and the forecast
+with st.spinner("Predicting Views for the next Week"):
+    # Prepare the ds/y frame the forecast engines take, with naive UTC dates and float views
+    forecast_df = pd.DataFrame({'ds': all_video_data['published_date'].dt.tz_localize(None),
+                                'y': for_plotting(all_video_data['view_count'])})
 
-    # Plotting using Plotly
-    # Filter the forecast dataframe to include only the forecasted period
-    forecasted_period = forecast[forecast['ds'] > forecast_df['ds'].max()]
+    # The forecast is cached per input series; when the data changed, the last forecast is
+    # shown while the model refits in the background
+    forecast, is_current = get_forecast(forecast_df, f"{st.session_state.CHANNEL_ID}:{forecast_engine}",
+                                        engine=forecast_engine)
+    if not is_current:
+        st.caption("Showing the previous forecast while the model is refitted on the latest data.")
 
     # Plotting using Plotly
     # Filter the forecast dataframe to include only the forecasted period
@@ -342,28 +412,21 @@ with col1:
     st.divider()
     with st.spinner("Generating Word Cloud..."):
         st.subheader("Most Common Tags")
-        # Extracting tags from DataFrame and creating a single string
-        all_tags = " ".join(" ".join(tags) for tags in filtered_data['tags'])
-
-        # Generating the word cloud
-        wordcloud = WordCloud(width=800, height=400, background_color='black').generate(all_tags)
-
-        # Plotting the word cloud using matplotlib
-        plt.figure(figsize=(10, 5))
-        plt.imshow(wordcloud, interpolation='bilinear')
-        plt.axis('off')
-        plt.tight_layout(pad=0)
-
-        # Saving the figure to a bytes buffer
-        buf = io.BytesIO()
-        plt.savefig(buf, format="png", bbox_inches='tight', pad_inches=0)
-        buf.seek(0)
-
-        st.image(buf, use_column_width=True)
+        # tag counts are computed once per dataset and filter state, the image once per tag counts
+        tag_filters = (date_range_start, date_range_end, tag_search)
+        frequencies, frequency_hash = load_tag_frequencies(st.session_state.CHANNEL_ID,
+                                                           all_video_data.attrs.get('synced_at'),
+                                                           tag_filters, filtered_data['tags'])
+
+        if frequencies.empty:
+            st.info("No tags in the selected videos.")
+        else:
+            st.image(render_word_cloud(frequency_hash, tag_filters, frequencies),
+                     use_column_width=True)
 
 with col2:
     # Calculating the Like-to-View Ratio
-    filtered_data['like_to_view_ratio'] = filtered_data['like_count'] / filtered_data['view_count']
+    filtered_data['like_to_view_ratio'] = for_plotting(filtered_data['like_count'] / filtered_data['view_count'])
 
     # Extracting the like-to-view ratio and published dates from the dataframe
     like_to_view_ratio = filtered_data['like_to_view_ratio']
@@ -392,4 +455,6 @@ st.divider()
 st.subheader("Detailed Video Statistics Video Selection")
 st.write("Click on view statistics to get detailed information related to the selected video")
 # latest 10 videos
-display_video_list(videos, 0, 10)
+display_video_list(videos, 0, 10,
+                   title_index=load_title_index(st.session_state.CHANNEL_ID, all_video_data.attrs.get('synced_at'),
+                                                videos))
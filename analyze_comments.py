@@ -1,45 +1,101 @@
 import pandas as pd
 import networkx as nx
-import matplotlib.pyplot as plt
 import numpy as np
-import igraph as ig
-import plotly.subplots as sp
+import plotly.graph_objects as go
 
-data = pd.read_excel("all_comments.xlsx")
+from graph_engine import compute_centrality, detect_communities, compute_layout
 
 
-def analyze_comments(data):
-    # Reset the graph
+def build_reply_edges(data):
+    """Resolves every reply to the author of the comment it answers with one join on comment_id.
+
+    Returns a DataFrame with one row per (source, target) author pair, where source replied
+    to target, and weight counts the replies between them.
+    """
+    if 'linkage' not in data:
+        return pd.DataFrame(columns=['source', 'target', 'weight'])
+
+    replies = data.loc[data['linkage'].notna(), ['author', 'linkage']]
+    parents = data[['comment_id', 'author']].drop_duplicates(subset='comment_id')
+
+    # hash join of each reply's linkage onto the parent comment's id
+    edges = replies.merge(parents, how='inner', left_on='linkage', right_on='comment_id',
+                          suffixes=('_reply', '_parent'))
+
+    return edges.groupby(['author_reply', 'author_parent'], sort=False, dropna=False) \
+                .size() \
+                .reset_index(name='weight') \
+                .rename(columns={'author_reply': 'source', 'author_parent': 'target'})
+
+
+def build_reply_graph(data):
+    """Builds the directed author reply graph, loading nodes and weighted edges in bulk."""
     G = nx.DiGraph()
 
     # Add nodes to the graph representing authors
-    for author in data['author'].unique():
-        G.add_node(author)
+    G.add_nodes_from(data['author'].unique())
 
     # Add edges to the graph representing replies
-    for _, row in data.dropna(subset=['linkage']).iterrows():
-        # Find the author of the main comment (the comment being replied to)
-        main_comment_authors = data[data['comment_id'] == row['linkage']]['author'].values
-        if main_comment_authors:
-            main_comment_author = main_comment_authors[0]
-            G.add_edge(row['author'], main_comment_author)
-
-    # Calculate centrality measures again
-    degree_centrality = nx.degree_centrality(G)
-    in_degree_centrality = nx.in_degree_centrality(G)
-    out_degree_centrality = nx.out_degree_centrality(G)
-    betweenness_centrality = nx.betweenness_centrality(G)
-    closeness_centrality = nx.closeness_centrality(G)
-
-    # Create a DataFrame to display the results
-    centrality_df = pd.DataFrame({
-        'Author': list(degree_centrality.keys()),
-        'Degree Centrality': list(degree_centrality.values()),
-        'In-Degree Centrality': list(in_degree_centrality.values()),
-        'Out-Degree Centrality': list(out_degree_centrality.values()),
-        'Betweenness Centrality': list(betweenness_centrality.values()),
-        'Closeness Centrality': list(closeness_centrality.values())
-    }).sort_values(by='Degree Centrality', ascending=False)
+    G.add_weighted_edges_from(build_reply_edges(data).itertuples(index=False, name=None))
+
+    return G
+
+
+def network_figure(G, pos, title, colors=None, show_labels=True):
+    """Draws a graph with Plotly, batching every edge into a single line trace.
+
+    Edges become one polyline with gaps between segments, so the figure has two traces
+    however many edges there are. colors holds a number per node for the colour scale.
+    """
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    xy = np.array([pos[node] for node in nodes], dtype=float).reshape(-1, 2)
+    edges = np.array([(index[u], index[v]) for u, v in G.edges()], dtype=int).reshape(-1, 2)
+
+    # each edge is start, end, gap
+    gaps = np.full(len(edges), np.nan)
+    edge_x = np.column_stack([xy[edges[:, 0], 0], xy[edges[:, 1], 0], gaps]).ravel()
+    edge_y = np.column_stack([xy[edges[:, 0], 1], xy[edges[:, 1], 1], gaps]).ravel()
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=edge_x, y=edge_y,
+                             mode='lines',
+                             line=dict(width=0.7, color='gray'),
+                             opacity=0.5,
+                             hoverinfo='skip',
+                             showlegend=False))
+    fig.add_trace(go.Scatter(x=xy[:, 0], y=xy[:, 1],
+                             mode='markers+text' if show_labels else 'markers',
+                             text=[str(node) for node in nodes],
+                             textposition='top center',
+                             hovertext=[f"{node} ({G.degree(node)} replies)" for node in nodes],
+                             hoverinfo='text',
+                             marker=dict(size=12,
+                                         color='skyblue' if colors is None else colors,
+                                         colorscale='Rainbow',
+                                         line=dict(width=0.5, color='white')),
+                             showlegend=False))
+
+    fig.update_layout(title=title,
+                      template="plotly_dark",
+                      height=700,
+                      xaxis=dict(visible=False),
+                      yaxis=dict(visible=False, scaleanchor='x'),
+                      margin=dict(l=10, r=10, t=50, b=10))
+    return fig
+
+
+def analyze_comments(data, engine="auto", approximate=False, accuracy=None, time_budget=None, seed=42):
+    G = build_reply_graph(data)
+
+    # Calculate centrality measures, with igraph doing the work on larger graphs and
+    # betweenness/closeness optionally sampled to meet an accuracy target or time budget
+    centrality_df = compute_centrality(G, engine, approximate, accuracy, time_budget, seed)
+
+    # Detect communities on the whole reply graph
+    membership, modularity = detect_communities(G, engine, seed)
+    centrality_df['Community'] = centrality_df['Author'].map(membership)
+    centrality_df.attrs['modularity'] = modularity
 
     print(centrality_df.head(10))
 
@@ -47,69 +103,40 @@ def analyze_comments(data):
 
     # Select the top N authors based on degree centrality for the subgraph
     N = 50
-    top_authors = [author for author, _ in
-                   sorted(degree_centrality.items(), key=lambda item: item[1], reverse=True)[:N]]
+    top_authors = centrality_df['Author'].head(N).tolist()
 
     # Extract the subgraph
     subgraph = G.subgraph(top_authors)
 
-    # Draw the subgraph
-    fig_subgraph = plt.figure(figsize=(12, 12))
-    pos = nx.spring_layout(subgraph)
-    nx.draw_networkx(subgraph, pos, with_labels=True, node_size=500, node_color='skyblue', font_size=10, alpha=0.6,
-                     edge_color='gray')
-
-    plt.title("Subgraph of Top 50 Authors based on Degree Centrality")
-    plt.close(fig_subgraph)
-
-    # Sample a subset of nodes for the subgraph
-    sample_size = 500
-    sampled_nodes = list(G.nodes())[:sample_size]
-
-    # Extract the subgraph for the sampled nodes
-    sampled_subgraph = G.subgraph(sampled_nodes)
-
-    # Use the Girvan-Newman algorithm on the sampled subgraph
-    sampled_communities_gn = nx.community.girvan_newman(sampled_subgraph)
-
-    # Get the first partitioning of communities for the sampled subgraph
-    sampled_first_partition = next(sampled_communities_gn)
-
-    # Convert the first_partition into a more readable format
-    sampled_community_list_gn = [list(community) for community in sampled_first_partition]
-
-    # Display the number of detected communities and the size of each community for the sampled subgraph
-    sampled_community_sizes_gn = {f"Sampled Community GN {i + 1}": len(community) for i, community in
-                                  enumerate(sampled_community_list_gn)}
-    no_of_communities = len(sampled_community_sizes_gn)
-
-    # Generate a new position layout for the nodes in the sampled subgraph
-    sampled_pos = nx.spring_layout(sampled_subgraph)
-
-    # Helper function to get edges for a community
-    def get_edges(G, community):
-        return [(u, v) for u, v in G.edges() if u in community and v in community]
-
-    # Visualize the communities in the sampled subgraph
-    fig_communities = plt.figure(figsize=(15, 15))
-
-    # Get unique colors for each community
-    colors = plt.cm.rainbow(np.linspace(0, 1, len(sampled_community_list_gn)))
-
-    # Draw nodes and edges with community colors
-    for community, color in zip(sampled_community_list_gn, colors):
-        nx.draw_networkx_nodes(sampled_subgraph, sampled_pos, nodelist=community, node_color=[color] * len(community),
-                               node_size=500)
-        nx.draw_networkx_edges(sampled_subgraph, sampled_pos, edgelist=get_edges(sampled_subgraph, community),
-                               alpha=0.5)
-
-    # Draw labels for nodes
-    nx.draw_networkx_labels(sampled_subgraph, sampled_pos, font_size=10, font_weight="bold")
-
-    plt.title("Communities in Sampled Subgraph")
-    plt.axis("off")
-    plt.close(fig_communities)
+    # Draw the subgraph, reusing the cached layout when the graph is unchanged
+    fig_subgraph = network_figure(subgraph, compute_layout(subgraph, engine, seed),
+                                  "Subgraph of Top 50 Authors based on Degree Centrality")
+
+    # Group authors by community; IDs are numbered from the largest community down
+    communities = {}
+    for author, community_id in membership.items():
+        communities.setdefault(community_id, []).append(author)
+
+    # Authors who never exchanged a reply form singleton communities and are not counted
+    community_list = [communities[i] for i in sorted(communities) if len(communities[i]) > 1]
+    no_of_communities = len(community_list)
+
+    # Show the largest communities, up to the node limit of the visualization
+    visible_nodes = 500
+    shown_communities = []
+    for community in community_list:
+        if visible_nodes <= 0:
+            break
+        shown_communities.append(community[:visible_nodes])
+        visible_nodes -= len(community)
+
+    # Extract the subgraph for the shown communities
+    community_subgraph = G.subgraph([author for community in shown_communities for author in community])
+
+    # Visualize the largest communities, coloured by community ID
+    fig_communities = network_figure(community_subgraph, compute_layout(community_subgraph, engine, seed),
+                                     "Largest Communities in the Reply Network",
+                                     colors=[membership[node] for node in community_subgraph.nodes()],
+                                     show_labels=False)
 
     return centrality_df, fig_subgraph, fig_communities, no_of_communities
-
-# analyze_comments(data)
@@ -0,0 +1,92 @@
+"""Rank agreement and speed of approximate (pivot sampled) centrality vs exact.
+
+    python benchmarks/bench_approx_centrality.py --sizes 2000 10000 --time-budgets 0.2 1
+
+Prints the Spearman rank correlation of the sampled betweenness and closeness columns
+against the exact ones and fails if either drifts below --min-correlation. Before
+timing, it checks that sampling every node reproduces the exact scores and that an
+accuracy target starts sampling right at graph_engine.sampling_threshold.
+"""
+import argparse
+import os
+import sys
+import time
+
+import networkx as nx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyze_comments import build_reply_graph  # noqa: E402
+from bench_reply_graph import synthetic_comments  # noqa: E402
+from graph_engine import compute_centrality, igraph_available, sampling_threshold, select_engine  # noqa: E402
+
+
+def rank_correlation(exact_df, approx_df, column):
+    exact = exact_df.set_index('Author')[column]
+    approx = approx_df.set_index('Author')[column].reindex(exact.index)
+    return exact.corr(approx, method='spearman')
+
+
+def check_all_pivots_match_exact(G, engine):
+    exact_df = select_engine(G, engine).centrality(G)
+    all_pivots_df = select_engine(G, engine).centrality(G, np.arange(G.number_of_nodes()))
+    for column in ['Betweenness Centrality', 'Closeness Centrality']:
+        assert np.allclose(exact_df[column], all_pivots_df[column]), f"{engine}: {column} with every pivot"
+
+
+def check_sampling_threshold(engine, accuracy=0.1):
+    threshold = sampling_threshold(accuracy)
+    for n, expected in [(threshold - 1, "exact"), (threshold, "approximate")]:
+        G = nx.gnm_random_graph(n, 2 * n, seed=1, directed=True)
+        mode = compute_centrality(G, engine, approximate=True, accuracy=accuracy).attrs['centrality_modes']
+        assert mode['Betweenness Centrality'].startswith(expected), f"{engine}: {n} nodes gave {mode}"
+    print(f"  {engine:>8} accuracy {accuracy} samples from {threshold:,} nodes")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 10000],
+                        help="number of comments the reply graphs are built from")
+    parser.add_argument("--time-budgets", type=float, nargs="+", default=[0.2, 1.0])
+    parser.add_argument("--accuracies", type=float, nargs="+", default=[0.1, 0.05])
+    parser.add_argument("--min-correlation", type=float, default=0.8)
+    args = parser.parse_args()
+
+    engines = ["networkx", "igraph"] if igraph_available() else ["networkx"]
+
+    small = build_reply_graph(synthetic_comments(300))
+    for engine in engines:
+        check_all_pivots_match_exact(small, engine)
+    for engine in engines:
+        check_sampling_threshold(engine)
+    for accuracy in [0.1, 0.05, 0.02, 0.01]:
+        print(f"  accuracy {accuracy}: sampling starts at {sampling_threshold(accuracy):,} nodes")
+
+    for size in args.sizes:
+        G = build_reply_graph(synthetic_comments(size))
+        print(f"{G.number_of_nodes():,} nodes, {G.number_of_edges():,} edges")
+
+        for engine in engines:
+            start = time.perf_counter()
+            exact_df = compute_centrality(G, engine)
+            print(f"  {engine:>8} exact: {time.perf_counter() - start:7.2f}s")
+
+            targets = [{"time_budget": budget} for budget in args.time_budgets] + \
+                      [{"accuracy": accuracy} for accuracy in args.accuracies]
+            for target in targets:
+                start = time.perf_counter()
+                approx_df = compute_centrality(G, engine, approximate=True, seed=7, **target)
+                elapsed = time.perf_counter() - start
+
+                betweenness = rank_correlation(exact_df, approx_df, 'Betweenness Centrality')
+                closeness = rank_correlation(exact_df, approx_df, 'Closeness Centrality')
+                mode = approx_df.attrs['centrality_modes']['Closeness Centrality']
+                print(f"  {engine:>8} {str(target):>24}: {elapsed:7.2f}s  spearman betweenness "
+                      f"{betweenness:.3f} closeness {closeness:.3f}  [{mode}]")
+                assert betweenness >= args.min_correlation, "betweenness ranks drifted too far"
+                assert closeness >= args.min_correlation, "closeness ranks drifted too far"
+
+
+if __name__ == "__main__":
+    main()
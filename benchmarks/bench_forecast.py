@@ -0,0 +1,79 @@
+"""Benchmark: fit latency and backtest error of the forecast engines.
+
+    python benchmarks/bench_forecast.py --videos 500 2000
+
+Builds a synthetic channel with irregular uploads, a slow trend and a weekly pattern,
+holds out the last FORECAST_DAYS days and fits every installed engine on the rest.
+A carried-forward mean is included as a baseline. The error is measured against the held out daily means of views per video, as the
+forecast chart shows them.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from forecast import FORECAST_DAYS, available_engines, daily_series, fit_forecast  # noqa: E402
+
+
+def synthetic_channel(n_videos, days=1500, seed=0):
+    """Per-video ds/y points: uploads at random times, more views on weekend uploads."""
+    rng = np.random.default_rng(seed)
+    offsets = np.sort(rng.uniform(0, days, n_videos))
+    ds = pd.Timestamp("2020-01-01") + pd.to_timedelta(offsets, unit="D")
+
+    weekend = np.isin(ds.dayofweek, [5, 6])
+    log_views = 8 + 1.5 * offsets / days + 0.6 * weekend + rng.normal(0, 0.8, n_videos)
+    return pd.DataFrame({"ds": ds, "y": np.round(np.expm1(log_views))})
+
+
+def naive_forecast(train, periods=FORECAST_DAYS):
+    """Baseline: the mean views per video of the last periods days, carried forward."""
+    recent = train[train["ds"] > train["ds"].max() - pd.Timedelta(days=periods)]
+    ds = pd.date_range(train["ds"].max().normalize() + pd.Timedelta(days=1), periods=periods)
+    return None, pd.DataFrame({"ds": ds, "yhat": recent["y"].mean()})
+
+
+def backtest(history, engine, periods=FORECAST_DAYS):
+    cutoff = history["ds"].max().normalize() - pd.Timedelta(days=periods)
+    train = history[history["ds"] < cutoff]
+    test = history[history["ds"] >= cutoff]
+
+    start = time.perf_counter()
+    _, forecast = naive_forecast(train, periods) if engine == "naive" else fit_forecast(train, periods, engine)
+    elapsed = time.perf_counter() - start
+
+    # compare on days that actually had uploads
+    actual = test.groupby(test["ds"].dt.normalize())["y"].mean()
+    predicted = forecast.set_index(forecast["ds"].dt.normalize())["yhat"]
+    predicted = predicted[~predicted.index.duplicated(keep="last")].reindex(actual.index)
+    mask = predicted.notna().to_numpy()
+
+    errors = np.abs(actual.to_numpy()[mask] - predicted.to_numpy()[mask])
+    log_errors = np.abs(np.log1p(actual.to_numpy()[mask]) - np.log1p(predicted.to_numpy()[mask].clip(min=0)))
+    return elapsed, errors.mean(), log_errors.mean(), mask.sum()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", type=int, nargs="+", default=[500, 2000])
+    args = parser.parse_args()
+
+    engines = available_engines()
+    print("engines:", ", ".join(engines))
+
+    for n_videos in args.videos:
+        history = synthetic_channel(n_videos)
+        print(f"\n{n_videos:,} videos, {len(daily_series(history)):,} days")
+        for engine in ["naive"] + engines:
+            elapsed, mae, log_mae, days = backtest(history, engine)
+            print(f"  {engine:<10} fit {elapsed:7.2f}s  MAE {mae:>10,.0f} views  "
+                  f"log MAE {log_mae:5.3f}  ({days} held out days)")
+
+
+if __name__ == "__main__":
+    main()
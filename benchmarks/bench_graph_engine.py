@@ -0,0 +1,52 @@
+"""Benchmark and parity check: networkx vs igraph centrality engines.
+
+    python benchmarks/bench_graph_engine.py --sizes 2000 10000
+
+Both engines must return the same centrality_df; the script fails if any column differs.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from analyze_comments import build_reply_graph  # noqa: E402
+from bench_reply_graph import synthetic_comments  # noqa: E402
+from graph_engine import CENTRALITY_COLUMNS, compute_centrality  # noqa: E402
+
+
+def assert_same(networkx_df, igraph_df):
+    left = networkx_df.set_index('Author').sort_index()
+    right = igraph_df.set_index('Author').sort_index()
+    for column in CENTRALITY_COLUMNS[1:]:
+        assert np.allclose(left[column], right[column], atol=1e-9), f"{column} differs"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 10000],
+                        help="number of comments the reply graphs are built from")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        G = build_reply_graph(synthetic_comments(size))
+
+        start = time.perf_counter()
+        networkx_df = compute_centrality(G, "networkx")
+        networkx_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        igraph_df = compute_centrality(G, "igraph")
+        igraph_elapsed = time.perf_counter() - start
+
+        assert_same(networkx_df, igraph_df)
+        print(f"{G.number_of_nodes():>7,} nodes {G.number_of_edges():>7,} edges: "
+              f"networkx {networkx_elapsed:8.2f}s  igraph {igraph_elapsed:6.2f}s "
+              f"({networkx_elapsed / igraph_elapsed:,.0f}x)  columns match")
+
+
+if __name__ == "__main__":
+    main()
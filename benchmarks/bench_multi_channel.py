@@ -0,0 +1,80 @@
+"""Benchmark: one download per channel in turn vs syncChannels against a fake API.
+
+    python benchmarks/bench_multi_channel.py --channels 20 --videos 500 --latency 0.05
+
+The sequential baseline is what loading N channels took before: getChannelData
+and a full syncChannelVideos per channel, one after the other. Both runs start
+with an empty response cache and channel store. The fake channels share video
+IDs, so some statistics calls are answered from the response cache.
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_youtube_api import FakeYoutubeApi  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--channels", type=int, default=20)
+    parser.add_argument("--videos", type=int, default=500, help="uploads per channel")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every request")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    args = parser.parse_args()
+
+    api = FakeYoutubeApi(n_videos=args.videos, latency=args.latency).start()
+    os.environ["YOUTUBE_API_ENDPOINT"] = api.endpoint
+
+    import channelSync
+    import responseCache
+    from channelDataExtraction import getChannelData
+
+    channel_ids = ["UCbench%04d" % i for i in range(args.channels)]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # the sequential path still writes all_vids_info.xlsx to the working directory
+        os.chdir(work_dir)
+
+        def fresh_state(name):
+            responseCache.CACHE_DIR = os.path.join(work_dir, name, "api")
+            responseCache._index = None
+            channelSync.STORE_DIR = os.path.join(work_dir, name, "data")
+
+        fresh_state("sequential")
+        requests_before = api.request_count
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for channel_id in channel_ids:
+                details = getChannelData("bench-sequential", channel_id)
+                channelSync.syncChannelVideos("bench-sequential", channel_id, details["uploads"])
+        baseline = time.perf_counter() - start
+        print(f"{'sequential':>14}: {baseline:7.2f}s  {api.request_count - requests_before} requests")
+
+        for workers in args.workers:
+            fresh_state(f"workers-{workers}")
+            requests_before = api.request_count
+            start = time.perf_counter()
+            channel_details, video_data, failed = channelSync.syncChannels(f"bench-{workers}", channel_ids,
+                                                                           max_workers=workers)
+            elapsed = time.perf_counter() - start
+
+            assert not failed, failed
+            assert len(video_data) == args.channels * args.videos
+            assert list(channel_details) == channel_ids
+            print(f"{workers:>6} workers: {elapsed:7.2f}s  {api.request_count - requests_before} requests  "
+                  f"({baseline / elapsed:4.1f}x)")
+
+        os.chdir(ROOT)
+
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
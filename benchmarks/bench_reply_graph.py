@@ -0,0 +1,72 @@
+"""Benchmark: reply graph construction with a single join vs the per-reply boolean mask scan.
+
+    python benchmarks/bench_reply_graph.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import networkx as nx  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from analyze_comments import build_reply_graph  # noqa: E402
+
+
+def synthetic_comments(n_comments, reply_share=0.4, seed=0):
+    """Comment frame where about reply_share of the rows reply to an earlier comment."""
+    rng = np.random.default_rng(seed)
+    comment_ids = np.array(["c%d" % i for i in range(n_comments)], dtype=object)
+    authors = np.array(["author%d" % a for a in rng.integers(0, max(n_comments // 4, 10), n_comments)],
+                       dtype=object)
+
+    is_reply = rng.random(n_comments) < reply_share
+    is_reply[0] = False
+    parents = (rng.random(n_comments) * np.arange(n_comments)).astype(np.int64)
+    linkage = np.where(is_reply, comment_ids[parents], None)
+
+    return pd.DataFrame({'comment_id': comment_ids, 'author': authors, 'linkage': linkage})
+
+
+def legacy_reply_graph(data):
+    """The iterrows/boolean-mask construction analyze_comments used before."""
+    G = nx.DiGraph()
+    for author in data['author'].unique():
+        G.add_node(author)
+    for _, row in data.dropna(subset=['linkage']).iterrows():
+        main_comment_authors = data[data['comment_id'] == row['linkage']]['author'].values
+        if main_comment_authors:
+            G.add_edge(row['author'], main_comment_authors[0])
+    return G
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--legacy-max", type=int, default=10000,
+                        help="largest size the quadratic legacy builder is run on")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        data = synthetic_comments(size)
+
+        start = time.perf_counter()
+        G = build_reply_graph(data)
+        elapsed = time.perf_counter() - start
+        line = f"{size:>9,} comments: join {elapsed:7.3f}s ({G.number_of_edges():,} edges)"
+
+        if size <= args.legacy_max:
+            start = time.perf_counter()
+            legacy = legacy_reply_graph(data)
+            legacy_elapsed = time.perf_counter() - start
+            assert set(legacy.edges()) == set(G.edges()), "edge sets differ"
+            line += f"  legacy {legacy_elapsed:7.3f}s ({legacy_elapsed / elapsed:,.0f}x)"
+
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark: cold import time and time to first render of every dashboard page.
+
+    python benchmarks/bench_startup.py [--output startup.json]
+
+For each page the top level imports are run in a fresh interpreter under
+python -X importtime, and the slowest packages are listed. The page is then run once
+headless with streamlit.testing's AppTest, without an API key or selected video, to
+time its first render. The AppTest step is skipped when the installed Streamlit does
+not ship it (it arrived in 1.28).
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RENDER_SCRIPT = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+app.session_state['video_id'] = None
+app.run()
+print(time.perf_counter() - start)
+if app.exception:
+    raise SystemExit(str(app.exception[0].value))
+"""
+
+
+def top_level_imports(page):
+    """Source of the import statements at the top level of a page script."""
+    with open(page, "r", encoding="utf-8") as page_file:
+        tree = ast.parse(page_file.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def import_times(page, top=8):
+    """Runs the page's imports under -X importtime and returns (wall seconds, slowest packages)."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", top_level_imports(page)],
+                            cwd=ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    # lines look like "import time:      self [us] | cumulative | imported package"
+    packages = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name[1:].startswith(" "):  # only packages imported by the page itself
+            packages.append((name.strip(), int(cumulative) / 1e6))
+
+    return elapsed, sorted(packages, key=lambda package: package[1], reverse=True)[:top]
+
+
+def first_render(page):
+    try:
+        import streamlit.testing.v1  # noqa: F401
+    except ImportError:
+        return None
+
+    result = subprocess.run([sys.executable, "-c", RENDER_SCRIPT, page], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", help="also write the measurements to this JSON file")
+    args = parser.parse_args()
+
+    pages = [os.path.join(ROOT, "Home.py")] + sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")))
+    report = {}
+
+    for page in pages:
+        name = os.path.relpath(page, ROOT)
+        elapsed, packages = import_times(page)
+        render = first_render(page)
+        report[name] = {"import_seconds": elapsed, "first_render_seconds": render,
+                        "slowest_imports": dict(packages)}
+
+        render_text = f"{render:6.2f}s" if render is not None else "   n/a"
+        print(f"{name}: imports {elapsed:6.2f}s  first render {render_text}")
+        for package, seconds in packages:
+            print(f"    {package:<40} {seconds:6.3f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
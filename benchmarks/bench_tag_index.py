@@ -0,0 +1,66 @@
+"""Benchmark: TagIndex queries vs the per-row apply the sidebar tag filter used.
+
+    python benchmarks/bench_tag_index.py --videos 50000
+
+Tags are drawn from a Zipf-like vocabulary so a few tags are common and most are
+rare, as on real channels. The exact-tag query must select the same rows as the
+previous apply; the boolean and prefix queries have no apply equivalent and are timed
+on their own.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from tag_index import TagIndex  # noqa: E402
+
+QUERIES = ["tag3", "tag3, tag17", "tag3|tag17|tag250", "tag1*, -tag2", "tag12*"]
+
+
+def synthetic_tags(n_videos, vocabulary=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(0, 15, n_videos)
+    ranks = np.minimum(rng.zipf(1.3, counts.sum()), vocabulary)
+    names = np.array(["tag%d" % rank for rank in range(vocabulary + 1)], dtype=object)
+    split = np.cumsum(counts)[:-1]
+    return pd.Series([list(tags) for tags in np.split(names[ranks], split)])
+
+
+def best_of(function, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", type=int, default=50000)
+    args = parser.parse_args()
+
+    tags = synthetic_tags(args.videos)
+    data = pd.DataFrame({"tags": tags})
+
+    build, index = best_of(lambda: TagIndex(tags), repeat=3)
+    print(f"{args.videos:,} videos, {len(index.tags):,} distinct tags, index built in {build * 1000:.0f} ms")
+
+    apply_time, expected = best_of(lambda: np.flatnonzero(data["tags"].apply(lambda x: "tag3" in x)))
+    index_time, positions = best_of(lambda: index.query("tag3"))
+    assert np.array_equal(expected, positions), "index and apply select different rows"
+    print(f"{'apply, tag3':<24} {apply_time * 1000:9.3f} ms")
+
+    for query in QUERIES:
+        elapsed, positions = best_of(lambda: index.query(query))
+        print(f"{'index, ' + query:<24} {elapsed * 1000:9.3f} ms  {len(positions):>6,} videos"
+              + (f"  ({apply_time / elapsed:,.0f}x)" if query == "tag3" else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark: TitleIndex search vs the substring list comprehension in display_video_list.
+
+    python benchmarks/bench_title_search.py --titles 10000 100000
+
+Every query is timed cold (first page, ranking included) and warm (next page of the
+same query). Queries that are substrings of titles must return every title the list
+comprehension finds; misspelled queries only have results through the index.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from title_search import TitleIndex  # noqa: E402
+
+WORDS = ["python", "tutorial", "beginners", "react", "hooks", "cooking", "pasta", "travel", "japan", "vlog",
+         "review", "unboxing", "iphone", "gaming", "minecraft", "live", "stream", "podcast", "episode", "music"]
+
+QUERIES = ["python", "react hooks", "minecraft live", "pyhton tutorial", "japn travel"]
+
+
+def synthetic_titles(n_titles, seed=0):
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(3, 9, n_titles)
+    return [" ".join(rng.choice(WORDS, length)).title() + " #%d" % i for i, length in enumerate(lengths)]
+
+
+def legacy_search(videos, query, start_index=0, end_index=10):
+    filtered_videos = [video for video in videos if query.lower() in video['title'].lower()]
+    return filtered_videos[start_index:end_index], len(filtered_videos)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    for n_titles in args.titles:
+        titles = synthetic_titles(n_titles)
+        videos = [{"id": str(i), "title": title} for i, title in enumerate(titles)]
+
+        start = time.perf_counter()
+        index = TitleIndex(titles)
+        print(f"\n{n_titles:,} titles, index built in {time.perf_counter() - start:.2f}s")
+        print(f"  {'query':<18} {'scan':>9} {'index cold':>11} {'next page':>10} {'scan hits':>10} {'index hits':>11}")
+
+        for query in QUERIES:
+            start = time.perf_counter()
+            _, scan_total = legacy_search(videos, query)
+            scan = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _, index_total = index.search(query, 0, 10)
+            cold = time.perf_counter() - start
+
+            start = time.perf_counter()
+            index.search(query, 10, 10)
+            warm = time.perf_counter() - start
+
+            assert index_total >= scan_total, "the index missed substring matches"
+            print(f"  {query:<18} {scan * 1000:7.2f}ms {cold * 1000:9.2f}ms {warm * 1000:8.3f}ms "
+                  f"{scan_total:>10,} {index_total:>11,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Local stand-in for the YouTube Data API used by the benchmarks.
+
+Serves deterministic channels, playlistItems, videos, commentThreads and comments responses with an artificial
+per-request latency so network-bound code paths can be timed without spending quota.
+"""
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGE_SIZE = 50
+
+
+class FakeYoutubeApi:
+    def __init__(self, n_videos=1000, latency=0.05, n_comment_threads=1000, replies_per_thread=12):
+        self.n_videos = n_videos
+        self.n_comment_threads = n_comment_threads
+        self.replies_per_thread = replies_per_thread
+        self.latency = latency
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def endpoint(self):
+        return "http://127.0.0.1:%d/" % self._server.server_port
+
+    def start(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # coalesce headers and body into one segment so keep-alive clients are not
+            # stalled by delayed ACKs
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                parsed = urllib.parse.urlparse(self.path)
+                params = {key: values[0] for key, values in urllib.parse.parse_qs(parsed.query).items()}
+                endpoint = parsed.path.rstrip("/").rsplit("/", 1)[-1]
+
+                with api._lock:
+                    api.request_count += 1
+                time.sleep(api.latency)
+
+                response = api.respond(endpoint, params)
+                etag = '"%s"' % response["etag"]
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def video_id(self, index):
+        # index 0 is the newest upload
+        return "vid%07d" % index
+
+    def respond(self, endpoint, params):
+        return getattr(self, endpoint)(params)
+
+    def channels(self, params):
+        items = [{
+            "id": channel_id,
+            "snippet": {"title": "Channel %s" % channel_id, "description": "",
+                        "thumbnails": {"medium": {"url": "https://example.com/%s.jpg" % channel_id}}},
+            "statistics": {"viewCount": "1000", "subscriberCount": "10", "videoCount": str(self.n_videos)},
+            "contentDetails": {"relatedPlaylists": {"uploads": "UU" + channel_id[2:]}},
+        } for channel_id in params["id"].split(",")]
+        return {"etag": "channels", "items": items}
+
+    def playlistItems(self, params):
+        start = int(params.get("pageToken", 0))
+        end = min(start + PAGE_SIZE, self.n_videos)
+        items = [{
+            "contentDetails": {"videoId": self.video_id(i)},
+            "snippet": {"title": "Video %d" % i,
+                        "thumbnails": {"default": {"url": "https://example.com/%d.jpg" % i}}},
+        } for i in range(start, end)]
+        response = {"etag": "playlist-%d" % start, "items": items}
+        if end < self.n_videos:
+            response["nextPageToken"] = str(end)
+        return response
+
+    def videos(self, params):
+        items = []
+        for video_id in params["id"].split(","):
+            i = int(video_id[3:])
+            items.append({
+                "id": video_id,
+                "snippet": {"title": "Video %d" % i,
+                            "publishedAt": "2023-%02d-%02dT12:00:00Z" % (12 - i // 28 % 12, 28 - i % 28),
+                            "tags": ["tag%d" % (i % 7), "topic %d" % (i % 13)],
+                            "thumbnails": {"standard": {"url": "https://example.com/%d.jpg" % i}}},
+                "contentDetails": {"duration": "PT%dM%dS" % (i % 20, i % 60)},
+                "statistics": {"viewCount": str(1000 + i * 7), "likeCount": str(10 + i),
+                               "favoriteCount": "0", "commentCount": str(i % 50)},
+            })
+        return {"etag": "videos-%s" % params["id"][:10], "items": items}
+
+    def comment_snippet(self, comment_id, author):
+        return {"authorDisplayName": "author%d" % author,
+                "likeCount": len(comment_id) + author % 17,
+                "textOriginal": "Text of %s" % comment_id,
+                "publishedAt": "2023-05-%02dT10:00:00Z" % (1 + author % 28)}
+
+    def reply(self, thread, index):
+        reply_id = "Ug%07d.r%03d" % (thread, index)
+        return {"id": reply_id, "snippet": self.comment_snippet(reply_id, (thread * 7 + index) % 97)}
+
+    def commentThreads(self, params):
+        start = int(params.get("pageToken", 0))
+        end = min(start + int(params.get("maxResults", 20)), self.n_comment_threads)
+        items = []
+        for thread in range(start, end):
+            thread_id = "Ug%07d" % thread
+            total_replies = self.replies_per_thread if thread % 3 == 0 else thread % 3
+            item = {"id": thread_id,
+                    "snippet": {"topLevelComment": {"id": thread_id,
+                                                    "snippet": self.comment_snippet(thread_id, thread % 97)},
+                                "totalReplyCount": total_replies}}
+            if total_replies:
+                # the API only inlines a handful of replies per thread
+                item["replies"] = {"comments": [self.reply(thread, r) for r in range(min(total_replies, 5))]}
+            items.append(item)
+
+        response = {"etag": "threads-%s-%d" % (params.get("order", "time"), start), "items": items}
+        if end < self.n_comment_threads:
+            response["nextPageToken"] = str(end)
+        return response
+
+    def comments(self, params):
+        thread = int(params["parentId"][2:])
+        total_replies = self.replies_per_thread if thread % 3 == 0 else thread % 3
+        start = int(params.get("pageToken", 0))
+        end = min(start + int(params.get("maxResults", 20)), total_replies)
+
+        response = {"etag": "replies-%d-%d" % (thread, start),
+                    "items": [self.reply(thread, r) for r in range(start, end)]}
+        if end < total_replies:
+            response["nextPageToken"] = str(end)
+        return response
@@ -0,0 +1,44 @@
+"""Synthetic commentThreads responses shaped like the YouTube Data API output."""
+import random
+
+
+def comment_snippet(rng, index, author_count):
+    return {
+        "authorDisplayName": "author%d" % rng.randrange(author_count),
+        "likeCount": rng.randrange(500),
+        "textOriginal": "Comment number %d, great video! ❤ %s" % (index, "lorem ipsum " * rng.randrange(1, 8)),
+        "publishedAt": "2023-%02d-%02dT%02d:%02d:00Z" % (rng.randrange(1, 13), rng.randrange(1, 29),
+                                                        rng.randrange(24), rng.randrange(60)),
+    }
+
+
+def iter_comment_pages(n_comments, threads_per_page=100, max_inline_replies=5, author_count=None, seed=0):
+    """Yields commentThreads pages until about n_comments rows (threads + replies) were produced."""
+    rng = random.Random(seed)
+    author_count = author_count or max(n_comments // 5, 10)
+    produced = 0
+    page = 0
+
+    while produced < n_comments:
+        items = []
+        for _ in range(threads_per_page):
+            thread_id = "Ug%09d" % produced
+            item = {"id": thread_id,
+                    "snippet": {"topLevelComment": {"snippet": comment_snippet(rng, produced, author_count)},
+                                "totalReplyCount": 0}}
+            produced += 1
+
+            reply_count = rng.choice([0, 0, 0, 1, 2, max_inline_replies])
+            if reply_count:
+                item["replies"] = {"comments": [
+                    {"id": "%s.r%d" % (thread_id, r), "snippet": comment_snippet(rng, produced + r, author_count)}
+                    for r in range(reply_count)]}
+                item["snippet"]["totalReplyCount"] = reply_count
+                produced += reply_count
+            items.append(item)
+
+        page += 1
+        response = {"items": items}
+        if produced < n_comments:
+            response["nextPageToken"] = "page%d" % page
+        yield response
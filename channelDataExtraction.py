@@ -1,36 +1,69 @@
-import googleapiclient.discovery
-
-
-def getChannelData(api_key, channel_id):
-    try:
-        # Create a YouTube API object
-        youtube = googleapiclient.discovery.build("youtube",
-                                                  "v3",
-                                                  developerKey=api_key)
-        # request channel details
-        request = youtube.channels().list(part="snippet,contentDetails,statistics",
-                                          id=channel_id)
-        response = request.execute()
-
-        # Get the channel details from the response
-        channel = response["items"][0]
-
-        # channel details dictionary
-        channel_details = {
-            "title": channel["snippet"]["title"],
-            "description": channel["snippet"]["description"],
-            "viewCount": channel["statistics"]["viewCount"],
-            "subscriberCount": channel["statistics"]["subscriberCount"],
-            "uploads": channel['contentDetails']['relatedPlaylists']['uploads'],
-            "thumbnail": channel['snippet']['thumbnails']['medium']['url']
-        }
-
-        print(channel_details)
-
-        return channel_details
-
-    except Exception as error:
-        return None
+from concurrent.futures import ThreadPoolExecutor
+
+from youtubeClient import getYoutubeClient
+from responseCache import cachedExecute
+from fetchEngine import MAX_WORKERS
+from quotaScheduler import INTERACTIVE
+
+# channels().list accepts at most 50 IDs per call
+CHANNEL_BATCH_SIZE = 50
+
+
+def parseChannelItem(channel):
+    # channel details dictionary
+    return {
+        "title": channel["snippet"]["title"],
+        "description": channel["snippet"]["description"],
+        "viewCount": channel["statistics"]["viewCount"],
+        # None for channels that hide their subscriber count
+        "subscriberCount": channel["statistics"].get("subscriberCount"),
+        "uploads": channel['contentDetails']['relatedPlaylists']['uploads'],
+        "thumbnail": channel['snippet']['thumbnails']['medium']['url']
+    }
+
+
+def fetchChannelBatch(api_key, channel_ids, priority=INTERACTIVE, revalidate=False):
+    """Fetches snippet, content details and statistics for up to 50 channel IDs."""
+    youtube = getYoutubeClient(api_key)
+    request = youtube.channels().list(part="snippet,contentDetails,statistics",
+                                      id=','.join(channel_ids))
+    return cachedExecute(request, priority, revalidate)
+
+
+def getChannelsData(api_key, channel_ids, priority=INTERACTIVE, revalidate=False):
+    """Resolves the details of many channels with one channels().list call per 50 IDs.
+
+    revalidate=True asks the API again even for channels whose cached details are fresh.
+
+    Returns:
+        dict of channel ID -> channel details, in input order. IDs the API does not
+        know (or returns incomplete data for) are left out.
+    """
+    channel_ids = list(dict.fromkeys(channel_ids))
+    chunks = [channel_ids[i:i + CHANNEL_BATCH_SIZE] for i in range(0, len(channel_ids), CHANNEL_BATCH_SIZE)]
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        responses = list(executor.map(lambda chunk: fetchChannelBatch(api_key, chunk, priority, revalidate), chunks))
+
+    found = {}
+    for response in responses:
+        for channel in response.get("items", []):
+            try:
+                found[channel["id"]] = parseChannelItem(channel)
+            except KeyError:
+                continue
+
+    return {channel_id: found[channel_id] for channel_id in channel_ids if channel_id in found}
+
+
+def getChannelData(api_key, channel_id, revalidate=False):
+    # no items means the channel ID does not exist; quota and server errors are raised
+    # by the quota scheduler so the caller can tell them apart from a bad ID
+    channel_details = getChannelsData(api_key, [channel_id], revalidate=revalidate).get(channel_id)
+
+    print(channel_details)
+
+    return channel_details
 
 
 #getChannelData(api_key, channel_id)
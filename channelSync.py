@@ -0,0 +1,276 @@
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from googleapiclient.errors import HttpError
+
+from fetchEngine import iterPlaylistPages, fetchVideoPages
+from channelDataExtraction import getChannelsData
+from channelVideoDataExtraction import parsePlaylistItem, parseVideoItem, videoStatsDataframe, \
+    exportVideoData, getVideoListWithStats
+from quotaScheduler import INTERACTIVE, QuotaExceeded, TRANSPORT_ERRORS
+from video_schema import apply_video_schema
+
+# Directory holding one persisted dataset per channel
+STORE_DIR = "data"
+
+# Newest videos whose statistics are refreshed on every sync
+RECENT_WINDOW = 50
+
+# Older videos refreshed per sync, cycling through the back catalogue
+ROTATION_SIZE = 200
+
+# Channels synced at once in multi-channel mode; their requests still share the
+# quota scheduler's in-flight limit
+MAX_CHANNEL_WORKERS = int(os.environ.get("YOUTUBE_SYNC_CHANNELS", 4))
+
+
+def storePath(channel_id):
+    return os.path.join(STORE_DIR, f"{channel_id}.pkl")
+
+
+def storeVersion(channel_id):
+    """Modification time of a channel's store, or None if it was never synced.
+
+    Cheap enough to call on every page run, so cached loads can be keyed on it and pick
+    up stores rewritten by another process (e.g. the ingest worker).
+    """
+    try:
+        return os.path.getmtime(storePath(channel_id))
+    except OSError:
+        return None
+
+
+def loadChannelStore(channel_id):
+    """Returns the persisted dataset for a channel, or None if it was never synced.
+
+    The store is a dict with the channel's "videos" list, its "video_data" frame, the
+    "channel_details" it was last synced with (None for older stores), "rotation_offset"
+    and "synced_at".
+    """
+    try:
+        with open(storePath(channel_id), "rb") as store_file:
+            store = pickle.load(store_file)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+    # stores written before the typed video schema hold dates as strings and counts as floats
+    store["video_data"] = apply_video_schema(store["video_data"])
+    store["video_data"].attrs.setdefault('synced_at', store.get("synced_at"))
+    store.setdefault("channel_details", None)
+    return store
+
+
+def saveChannelStore(channel_id, store):
+    os.makedirs(STORE_DIR, exist_ok=True)
+
+    # write to a temporary file first so readers never see a half written store
+    temp_path = storePath(channel_id) + ".tmp"
+    with open(temp_path, "wb") as store_file:
+        pickle.dump(store, store_file)
+    os.replace(temp_path, storePath(channel_id))
+
+
+def getNewUploads(api_key, playlist_id, known_ids, priority=INTERACTIVE):
+    """Pages the uploads playlist (newest first) until it reaches an already known video.
+
+    Pages are always revalidated, a cached first page would hide the newest uploads.
+    """
+    new_videos = []
+
+    for response in iterPlaylistPages(api_key, playlist_id, priority, revalidate=True):
+        for vid in response['items']:
+            video = parsePlaylistItem(vid)
+            if video['id'] in known_ids:
+                return new_videos
+            new_videos.append(video)
+
+    return new_videos
+
+
+def selectRefreshIds(videos, new_ids, rotation_offset, recent_window=RECENT_WINDOW,
+                     rotation_size=ROTATION_SIZE):
+    """Picks the video IDs whose statistics are refreshed this sync.
+
+    Returns:
+        (video_ids, next_rotation_offset)
+    """
+    video_ids = [video['id'] for video in videos if video['id'] is not None]
+    recent_ids = video_ids[:len(new_ids) + recent_window]
+    older_ids = video_ids[len(recent_ids):]
+
+    if not older_ids:
+        return recent_ids, 0
+
+    rotation_offset = rotation_offset % len(older_ids)
+    rotating_ids = (older_ids[rotation_offset:] + older_ids[:rotation_offset])[:rotation_size]
+    next_offset = (rotation_offset + len(rotating_ids)) % len(older_ids)
+
+    return recent_ids + rotating_ids, next_offset
+
+
+def syncChannelVideos(api_key, channel_id, playlist_id, full=False, priority=INTERACTIVE, export=True,
+                      channel_details=None):
+    """Brings the persisted dataset of a channel up to date and returns (videos, all_video_data).
+
+    The first sync (or full=True) downloads the whole uploads playlist. Later syncs stop
+    paging at the first known upload and only refresh statistics for the new videos,
+    the most recent RECENT_WINDOW videos and a rotating slice of older ones.
+
+    export=False leaves all_vids_info.xlsx alone, for syncs running next to each other.
+    channel_details is kept in the store so pages can show the channel without the API;
+    without it, the details stored by the previous sync are kept.
+
+    The store is the cache of a synced channel, so every request is revalidated with the
+    API instead of being answered from a fresh response cache entry.
+    """
+    store = None if full else loadChannelStore(channel_id)
+
+    if store is None:
+        videos, all_video_data = getVideoListWithStats(api_key, playlist_id, priority=priority, export=export,
+                                                       revalidate=True)
+
+        # callers key per-dataset indexes on the sync time
+        all_video_data.attrs['synced_at'] = time.time()
+        saveChannelStore(channel_id, {"videos": videos,
+                                      "video_data": all_video_data,
+                                      "channel_details": channel_details,
+                                      "rotation_offset": 0,
+                                      "synced_at": all_video_data.attrs['synced_at']})
+        return videos, all_video_data
+
+    known_ids = {video['id'] for video in store["videos"]}
+    new_videos = getNewUploads(api_key, playlist_id, known_ids, priority)
+    videos = new_videos + store["videos"]
+
+    refresh_ids, rotation_offset = selectRefreshIds(videos,
+                                                    [video['id'] for video in new_videos],
+                                                    store["rotation_offset"])
+
+    all_vids_stats = [parseVideoItem(vid)
+                      for response in fetchVideoPages(api_key, refresh_ids, priority=priority, revalidate=True)
+                      for vid in response['items']]
+
+    # replace refreshed rows and keep the frame in playlist order (newest first)
+    video_data = store["video_data"]
+    if all_vids_stats:
+        refreshed = videoStatsDataframe(all_vids_stats)
+        # concat turns categoricals with different categories (duration) back into strings
+        video_data = apply_video_schema(pd.concat([refreshed, video_data[~video_data['id'].isin(refreshed['id'])]]))
+
+    playlist_order = {video['id']: position for position, video in enumerate(videos)}
+    video_data = video_data.sort_values(by='id', key=lambda ids: ids.map(playlist_order), kind='stable') \
+                           .reset_index(drop=True)
+
+    video_data.attrs['synced_at'] = time.time()
+    saveChannelStore(channel_id, {"videos": videos,
+                                  "video_data": video_data,
+                                  "channel_details": channel_details or store["channel_details"],
+                                  "rotation_offset": rotation_offset,
+                                  "synced_at": video_data.attrs['synced_at']})
+
+    return videos, exportVideoData(video_data) if export else video_data
+
+
+def combineChannelData(channel_details, datasets):
+    """Stacks the video frames of several channels into one, tagged by channel.
+
+    Returns:
+        DataFrame with channel_id and channel_title in front of the video columns, and
+        attrs['synced_at'] set to the latest sync among the channels.
+    """
+    frames = [video_data.assign(channel_id=channel_id) for channel_id, video_data in datasets.items()]
+    if not frames:
+        return pd.DataFrame(columns=['channel_id', 'channel_title'])
+
+    # the channels' duration categories differ, so the schema is applied again after stacking
+    combined = apply_video_schema(pd.concat(frames, ignore_index=True))
+    combined.insert(0, 'channel_id', combined.pop('channel_id').astype('category'))
+    titles = {channel_id: channel_details[channel_id]['title'] for channel_id in datasets}
+    combined.insert(1, 'channel_title', combined['channel_id'].map(titles).astype('category'))
+
+    combined.attrs['synced_at'] = max(video_data.attrs.get('synced_at', 0) for video_data in datasets.values())
+    return combined
+
+
+def syncChannelDatasets(api_key, channel_ids, full=False, priority=INTERACTIVE, max_workers=None,
+                        revalidate=False):
+    """Syncs many channels concurrently, keeping each channel's frame separate.
+
+    Channel details are resolved 50 IDs per call (revalidate=True asks the API even when
+    they are cached), then up to max_workers channels are synced at once with
+    syncChannelVideos. A channel that fails (unknown ID, quota, API or network error) is
+    reported instead of stopping the others.
+
+    Returns:
+        (channel_details, datasets, failed) with channel details and video frames keyed by
+        channel ID, and failed mapping channel IDs to an error message.
+    """
+    channel_details = getChannelsData(api_key, channel_ids, priority, revalidate)
+    failed = {channel_id: "Channel not found." for channel_id in dict.fromkeys(channel_ids)
+              if channel_id not in channel_details}
+
+    def sync(channel_id):
+        return syncChannelVideos(api_key, channel_id, channel_details[channel_id]["uploads"],
+                                 full=full, priority=priority, export=False,
+                                 channel_details=channel_details[channel_id])[1]
+
+    datasets = {}
+    with ThreadPoolExecutor(max_workers=max_workers or MAX_CHANNEL_WORKERS) as executor:
+        futures = {channel_id: executor.submit(sync, channel_id) for channel_id in channel_details}
+
+        for channel_id, future in futures.items():
+            try:
+                datasets[channel_id] = future.result()
+            except (QuotaExceeded, HttpError, *TRANSPORT_ERRORS) as error:
+                failed[channel_id] = str(error)
+
+    channel_details = {channel_id: details for channel_id, details in channel_details.items()
+                       if channel_id in datasets}
+    return channel_details, datasets, failed
+
+
+def syncChannels(api_key, channel_ids, full=False, priority=INTERACTIVE, max_workers=None):
+    """Syncs many channels concurrently and returns them as one dataset.
+
+    Returns:
+        (channel_details, all_video_data, failed) as syncChannelDatasets, with the frames
+        combined by combineChannelData.
+    """
+    channel_details, datasets, failed = syncChannelDatasets(api_key, channel_ids, full, priority, max_workers)
+    return channel_details, combineChannelData(channel_details, datasets), failed
+
+
+def loadChannels(api_key, channel_ids, sync=False, priority=INTERACTIVE):
+    """Returns many channels as one dataset, read from their stores where possible.
+
+    Only channels without a store holding their details are synced, so pages kept up to
+    date by the ingest worker never wait on the API. sync=True syncs every channel.
+
+    Returns:
+        (channel_details, all_video_data, failed) like syncChannels.
+    """
+    channel_ids = list(dict.fromkeys(channel_ids))
+
+    channel_details, datasets = {}, {}
+    for channel_id in ([] if sync else channel_ids):
+        store = loadChannelStore(channel_id)
+        if store is not None and store["channel_details"] is not None:
+            channel_details[channel_id] = store["channel_details"]
+            datasets[channel_id] = store["video_data"]
+
+    missing = [channel_id for channel_id in channel_ids if channel_id not in channel_details]
+    failed = {}
+    if missing:
+        synced_details, synced_datasets, failed = syncChannelDatasets(api_key, missing, priority=priority,
+                                                                      revalidate=sync)
+        channel_details.update(synced_details)
+        datasets.update(synced_datasets)
+
+    # keep the order the channels were asked for
+    channel_details = {channel_id: channel_details[channel_id] for channel_id in channel_ids
+                       if channel_id in channel_details}
+    datasets = {channel_id: datasets[channel_id] for channel_id in channel_details}
+    return channel_details, combineChannelData(channel_details, datasets), failed
@@ -1,133 +1,280 @@
+import json
+import os
 import re
-import pandas as pd
-import googleapiclient.discovery
-
+import time
+from array import array
+from functools import partial
 
-def getVideoComments(api_key, video_id):
-    # Create a YouTube Data API object
-    youtube = googleapiclient.discovery.build("youtube", "v3", developerKey=api_key)
+import numpy as np
+import pandas as pd
 
-    # Make an API request to get all the comments for the video
-    request = youtube.commentThreads().list(part="snippet,replies",
-                                            videoId=video_id,
-                                            maxResults=100,
-                                            textFormat='plainText')
-    response = request.execute()
+from youtubeClient import getYoutubeClient
+from responseCache import cachedExecute
+from fetchEngine import iterPlaylistPages, fetchVideoPages, fetchUploadsWithStats, fetchAllReplies
+from quotaScheduler import INTERACTIVE
+from video_schema import apply_video_schema, for_export
+
+
+# Column order of the comment DataFrame
+COMMENT_COLUMNS = ['comment_id', 'author', 'like_count', 'comment_text', 'comment_date', 'linkage']
+
+# Default number of comments fetched for a video in one call
+MAX_COMMENTS = 1000
+
+# Next page tokens where comment fetches stopped, per video and order
+COMMENT_CHECKPOINTS = os.path.join(".cache", "comment_checkpoints.json")
+
+# Remove non-printable ASCII characters and the character '𝙄' from comment text
+ILLEGAL_CHARACTERS = re.compile(r'[^\x20-\x7E]|𝙄')
+
+
+class CommentColumns:
+    """Typed column buffers that comment rows are streamed into.
+
+    Rows are deduplicated on a hash of comment_id as they arrive, so the DataFrame is
+    only built once, from plain lists, at the end.
+    """
+
+    def __init__(self):
+        self.seen_ids = set()
+        self.comment_id = []
+        self.author = []
+        self.like_count = array('q')
+        self.comment_text = []
+        self.comment_date = []
+        self.linkage = []
+
+    def __len__(self):
+        return len(self.comment_id)
+
+    def append(self, comment_id, author, like_count, comment_text, comment_date, linkage):
+        id_hash = hash(comment_id)
+        if id_hash in self.seen_ids:
+            return
+        self.seen_ids.add(id_hash)
+
+        self.comment_id.append(comment_id)
+        self.author.append(author)
+        self.like_count.append(-1 if like_count is None else like_count)
+        self.comment_text.append(comment_text)
+        self.comment_date.append(comment_date)
+        self.linkage.append(linkage)
+
+    @staticmethod
+    def normalizeText(texts):
+        # most comments are plain ASCII and can skip the regex entirely
+        return [text if text is None or (text.isascii() and text.isprintable())
+                else ILLEGAL_CHARACTERS.sub('', text) for text in texts]
+
+    def toDataFrame(self):
+        like_count = np.frombuffer(self.like_count, dtype=np.int64) if len(self) else np.empty(0, np.int64)
+        like_count_column = pd.array(like_count, dtype='Int64')
+        like_count_column[like_count < 0] = pd.NA
+
+        # only the text columns can hold characters that break the Excel export
+        return pd.DataFrame({
+            'comment_id': self.comment_id,
+            'author': self.normalizeText(self.author),
+            'like_count': like_count_column,
+            'comment_text': self.normalizeText(self.comment_text),
+            'comment_date': pd.to_datetime(self.comment_date, utc=True).tz_localize(None),
+            'linkage': self.linkage,
+        }, columns=COMMENT_COLUMNS)
+
+
+def iterCommentPages(api_key, video_id, order='time', page_token=None, revalidate=False):
+    """Yields commentThreads responses for a video page by page, starting at page_token.
+
+    revalidate=True asks the API about every page even while its cached copy is fresh.
+    """
+    youtube = getYoutubeClient(api_key)
+
+    while True:
+        request = youtube.commentThreads().list(part="snippet,replies",
+                                                videoId=video_id,
+                                                maxResults=100,
+                                                order=order,
+                                                textFormat='plainText',
+                                                pageToken=page_token)
+        response = cachedExecute(request, revalidate=revalidate)
+        yield response
+
+        page_token = response.get('nextPageToken')
+        if page_token is None:
+            break
 
-    all_comments = []
 
+def iterCommentRows(response):
+    """Yields one row per top level comment and inline reply in a commentThreads response."""
     for comment in response['items']:
-        comment_data = {
-            'comment_id': comment['id'],
-            'author': comment["snippet"]["topLevelComment"]['snippet']
-            .get('authorDisplayName', None),
-            'like_count': comment["snippet"]["topLevelComment"]['snippet']
-            .get('likeCount', None),
-            'comment_text': comment["snippet"]["topLevelComment"]['snippet']
-            .get('textOriginal', None),
-            'comment_date': comment["snippet"]["topLevelComment"]['snippet']
-            .get('publishedAt', None),
-        }
-
-        all_comments.append(comment_data)
+        snippet = comment["snippet"]["topLevelComment"]['snippet']
+        yield (comment['id'],
+               snippet.get('authorDisplayName', None),
+               snippet.get('likeCount', None),
+               snippet.get('textOriginal', None),
+               snippet.get('publishedAt', None),
+               None)
 
         # Check if there are replies
-        if 'replies' in comment:
-            for reply in comment['replies']['comments']:
-                reply_data = {
-                    'comment_id': reply['id'],
-                    'author': reply['snippet']
-                    .get('authorDisplayName', None),
-                    'comment_text': reply['snippet']
-                    .get('textOriginal', None),
-                    'comment_date': reply['snippet']
-                    .get('publishedAt', None),
-                    'like_count': reply['snippet']
-                    .get('likeCount', None),
-                    'linkage': comment_data['comment_id'],  # Link reply to the main comment
-                }
-                all_comments.append(reply_data)
-
-    next_page_available = response.get('nextPageToken')
-    is_other_pages = True
-
-    while is_other_pages:
-        if len(all_comments) == 1000:
-            break
-        if next_page_available is None:
-            is_other_pages = False
-        else:
-            request = youtube.commentThreads() \
-                .list(part="snippet,replies",
-                      videoId=video_id,
-                      maxResults=100,
-                      textFormat='plainText',
-                      pageToken=next_page_available)
-            response = request.execute()
-
-            for comment in response['items']:
-                comment_data = {
-                    'comment_id': comment['id'],
-                    'author': comment["snippet"]["topLevelComment"]['snippet']
-                    .get('authorDisplayName', None),
-                    'like_count': comment["snippet"]["topLevelComment"]['snippet']
-                    .get('likeCount', None),
-                    'comment_text': comment["snippet"]["topLevelComment"]['snippet']
-                    .get('textOriginal', None),
-                    'comment_date': comment["snippet"]["topLevelComment"]['snippet']
-                    .get('publishedAt', None),
-                }
-
-                all_comments.append(comment_data)
-
-                # Check if there are replies
-                if 'replies' in comment:
-                    for reply in comment['replies']['comments']:
-                        reply_data = {
-                            'comment_id': reply['id'],
-                            'author': reply['snippet']
-                            .get('authorDisplayName', None),
-                            'comment_text': reply['snippet']
-                            .get('textOriginal', None),
-                            'comment_date': reply['snippet']
-                            .get('publishedAt', None),
-                            'like_count': reply['snippet']
-                            .get('likeCount', None),
-                            'linkage': comment_data['comment_id'],
-                        }
-                        all_comments.append(reply_data)
-
-            next_page_available = response.get('nextPageToken')
+        for reply in comment.get('replies', {}).get('comments', []):
+            snippet = reply['snippet']
+            yield (reply['id'],
+                   snippet.get('authorDisplayName', None),
+                   snippet.get('likeCount', None),
+                   snippet.get('textOriginal', None),
+                   snippet.get('publishedAt', None),
+                   comment['id'])  # Link reply to the main comment
 
-    # create the dataframe
-    comment_data = pd.DataFrame(all_comments)
 
-    # Define the regex pattern for illegal characters
-    # For this example, I'll remove non-printable ASCII characters and the character '𝙄'
-    pattern = r'[^\x20-\x7E]|𝙄'
+def iterReplyRows(parent_id, replies):
+    """Yields one row per reply returned by comments().list for a thread."""
+    for reply in replies:
+        snippet = reply['snippet']
+        yield (reply['id'],
+               snippet.get('authorDisplayName', None),
+               snippet.get('likeCount', None),
+               snippet.get('textOriginal', None),
+               snippet.get('publishedAt', None),
+               parent_id)
 
-    # Remove illegal characters from the entire dataframe
-    comment_data.replace(pattern, '', regex=True, inplace=True)
 
-    comment_data = comment_data.drop_duplicates()
-    comment_data["like_count"] = comment_data["like_count"]\
-                                 .apply(pd.to_numeric, errors='coerce')
+def truncatedThreadIds(response):
+    """Returns the IDs of threads that have more replies than the response included inline."""
+    return [comment['id'] for comment in response['items']
+            if comment['snippet'].get('totalReplyCount', 0) >
+            len(comment.get('replies', {}).get('comments', []))]
 
-    # Remove duplicates based on the 'comment_text' column
-    comment_data = comment_data.drop_duplicates(subset='comment_text')
 
-    # Convert 'published_date' to a pandas datetime object
-    comment_data['comment_date'] = pd.to_datetime(comment_data['comment_date'])
+def loadCommentCheckpoints():
+    try:
+        with open(COMMENT_CHECKPOINTS, "r", encoding="utf-8") as checkpoint_file:
+            return json.load(checkpoint_file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def checkpointKey(video_id, order, fetch_all_replies):
+    # fetches with and without full reply chains stop at different pages, so each has its own
+    return f"{video_id}:{order}:{'all_replies' if fetch_all_replies else 'inline_replies'}"
+
+
+def getCommentCheckpoint(video_id, order='time', fetch_all_replies=False):
+    """Returns the saved checkpoint of a video's comment fetch, or None if there is none.
+
+    A checkpoint is a dict with the 'page_token' to continue from and 'complete', which is
+    True once the last page has been read.
+    """
+    return loadCommentCheckpoints().get(checkpointKey(video_id, order, fetch_all_replies))
+
 
-    # Format 'published_date' with AM/PM in the timezone
-    comment_data['comment_date'] = comment_data['comment_date']\
-                                   .dt.strftime('%Y-%m-%d %I:%M:%S')
+def saveCommentCheckpoint(video_id, order, page_token, fetch_all_replies=False):
+    checkpoints = loadCommentCheckpoints()
+    checkpoints[checkpointKey(video_id, order, fetch_all_replies)] = {"page_token": page_token,
+                                                                      "complete": page_token is None,
+                                                                      "updated_at": time.time()}
+
+    os.makedirs(os.path.dirname(COMMENT_CHECKPOINTS), exist_ok=True)
+    temp_path = COMMENT_CHECKPOINTS + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as checkpoint_file:
+        json.dump(checkpoints, checkpoint_file)
+    os.replace(temp_path, COMMENT_CHECKPOINTS)
+
+
+def finalizeCommentData(comment_data):
+    # Remove duplicates based on the 'comment_text' column
+    comment_data = comment_data.drop_duplicates(subset='comment_text')
 
     # Sort the DataFrame by "like_count" in descending order
     comment_data = comment_data.sort_values(by="like_count", ascending=False)
     # Reset the index
     comment_data.reset_index(drop=True, inplace=True)
 
+    return comment_data
+
+
+def buildCommentData(pages, max_threads=None, max_comments=None, max_seconds=None, reply_fetcher=None):
+    """Streams comment pages into column buffers and builds the comment DataFrame once.
+
+    The budget is checked after every page, so a limit can be overshot by up to one page
+    (100 threads and their inline replies). If reply_fetcher is given, it is called with the
+    IDs of threads whose replies were truncated and must return (parent_id, replies) pairs;
+    those replies are merged in, deduplicated by comment ID. It also gets what is left of
+    the budget as deadline (a time.monotonic() value) and max_replies, each None when
+    unlimited, and is skipped when the thread pages used the budget up.
+
+    Returns:
+        (comment_data, last_response) where last_response is the last page that was read.
+    """
+    columns = CommentColumns()
+    threads = 0
+    truncated_threads = []
+    response = None
+    start = time.monotonic()
+
+    for response in pages:
+        for row in iterCommentRows(response):
+            columns.append(*row)
+        threads += len(response['items'])
+
+        if reply_fetcher is not None:
+            truncated_threads.extend(truncatedThreadIds(response))
+
+        if max_threads is not None and threads >= max_threads:
+            break
+        if max_comments is not None and len(columns) >= max_comments:
+            break
+        if max_seconds is not None and time.monotonic() - start >= max_seconds:
+            break
+
+    deadline = start + max_seconds if max_seconds is not None else None
+    max_replies = max_comments - len(columns) if max_comments is not None else None
+    budget_left = (deadline is None or time.monotonic() < deadline) and (max_replies is None or max_replies > 0)
+
+    if truncated_threads and budget_left:
+        for parent_id, replies in reply_fetcher(truncated_threads, deadline=deadline, max_replies=max_replies):
+            for row in iterReplyRows(parent_id, replies):
+                columns.append(*row)
+
+    return finalizeCommentData(columns.toDataFrame()), response
+
+
+def mergeCommentData(comment_data, more_comment_data):
+    """Combines comments fetched by separate calls, e.g. after resuming from a checkpoint."""
+    comment_data = pd.concat([comment_data, more_comment_data], ignore_index=True)
+    return finalizeCommentData(comment_data.drop_duplicates(subset='comment_id'))
+
+
+def getVideoComments(api_key, video_id, max_threads=None, max_comments=MAX_COMMENTS, max_seconds=None,
+                     order='time', resume=False, fetch_all_replies=False, revalidate=False):
+    """Fetches a video's comments within a budget of threads, comments and wall time.
+
+    order is 'time' or 'relevance'. Where the budget stops, the next page token is
+    checkpointed; resume=True continues from that checkpoint instead of page one and only
+    returns the newly fetched comments (combine them with mergeCommentData).
+
+    commentThreads only inlines a few replies per thread. With fetch_all_replies=True the
+    remaining replies of those threads are fetched with comments().list through a worker
+    pool with whatever time and comment budget the thread pages left.
+
+    revalidate=True asks the API about every thread and reply page instead of reusing the
+    response cache, for when the cached comments are known to be out of date.
+    """
+    reply_fetcher = partial(fetchAllReplies, api_key, revalidate=revalidate) if fetch_all_replies else None
+
+    page_token = None
+    if resume:
+        checkpoint = getCommentCheckpoint(video_id, order, fetch_all_replies)
+        if checkpoint is not None and checkpoint["complete"]:
+            return finalizeCommentData(CommentColumns().toDataFrame())
+        if checkpoint is not None:
+            page_token = checkpoint["page_token"]
+
+    # pages are consumed as they arrive so raw responses are never held all at once
+    comment_data, last_response = buildCommentData(iterCommentPages(api_key, video_id, order, page_token, revalidate),
+                                                   max_threads, max_comments, max_seconds, reply_fetcher)
+
+    saveCommentCheckpoint(video_id, order, last_response.get('nextPageToken'), fetch_all_replies)
+
     comment_data.to_excel("all_comments.xlsx", index=False)
 
     print(comment_data.head(5))
@@ -135,86 +282,69 @@ def getVideoComments(api_key, video_id):
     return comment_data
 
 
-def getVideoList(api_key, playlist_id):
-    # Create a YouTube API object
-    youtube = googleapiclient.discovery.build("youtube", "v3", developerKey=api_key)
+def parsePlaylistItem(vid):
+    return {
+        'id': vid['contentDetails'].get('videoId', None),
+        'title': vid['snippet'].get('title', None),
+        'thumbnail': vid['snippet']['thumbnails']['default']['url']
+    }
+
 
-    request = youtube.playlistItems().list(part="contentDetails,snippet",
-                                           playlistId=playlist_id,
-                                           maxResults=50)
-    response = request.execute()
+def parseVideoItem(vid):
+    thumbnail_url = vid['snippet']['thumbnails'].get('standard', {}).get('url', None)
 
+    return {
+        'id': vid.get('id', None),
+        'title': vid['snippet'].get('title', None),
+        'published_date': vid['snippet'].get('publishedAt', None),
+        'tags': vid['snippet'].get('tags', []),
+        'duration': vid['contentDetails'].get('duration', None),
+        'view_count': vid['statistics'].get('viewCount', None),
+        'like_count': vid['statistics'].get('likeCount', None),
+        'favorite_count': vid['statistics'].get('favoriteCount', None),
+        'comment_count': vid['statistics'].get('commentCount', None),
+        'thumbnail': thumbnail_url
+    }
+
+
+def getVideoList(api_key, playlist_id):
     all_videos = []
 
-    for vid in response['items']:
-        vid_stats = {
-            'id': vid['contentDetails'].get('videoId', None),
-            'title': vid['snippet'].get('title', None),
-            'thumbnail': vid['snippet']['thumbnails']['default']['url']
-        }
-        all_videos.append(vid_stats)
-
-    next_page_available = response.get('nextPageToken')
-    is_next_pages = True
-
-    while is_next_pages:
-        if next_page_available is None:
-            is_next_pages = False
-        else:
-            request = youtube.playlistItems().list(part="contentDetails,snippet",
-                                                   playlistId=playlist_id,
-                                                   maxResults=50,
-                                                   pageToken=next_page_available)
-            response = request.execute()
-
-            for vid in response['items']:
-                vid_stats = {
-                    'id': vid['contentDetails'].get('videoId', None),
-                    'title': vid['snippet'].get('title', None),
-                    'thumbnail': vid['snippet']['thumbnails']['default']['url']
-                }
-                all_videos.append(vid_stats)
-
-            next_page_available = response.get('nextPageToken')
+    for response in iterPlaylistPages(api_key, playlist_id):
+        for vid in response['items']:
+            all_videos.append(parsePlaylistItem(vid))
 
     # print(all_videos)
     return all_videos
 
 
-def buildVideoListDataframe(api_key, video_ids):
-    youtube = googleapiclient.discovery.build("youtube", "v3", developerKey=api_key)
+def getVideoListWithStats(api_key, playlist_id, max_workers=None, priority=INTERACTIVE, export=True,
+                          revalidate=False):
+    # statistics for each playlist page are fetched while the next page is requested
+    playlist_pages, video_pages = fetchUploadsWithStats(api_key, playlist_id, max_workers, priority, revalidate)
 
-    all_vids_stats = []
+    all_videos = [parsePlaylistItem(vid) for response in playlist_pages for vid in response['items']]
+    all_vids_stats = [parseVideoItem(vid) for response in video_pages for vid in response['items']]
 
-    for i in range(0, len(video_ids), 50):
-        request = youtube.videos().list(
-            part='snippet,contentDetails,statistics',
-            id=','.join(video_ids[i:i + 50]))
-        response = request.execute()
+    # export=False skips the shared Excel file, e.g. when several channels are synced at once
+    vids_info = videoStatsDataframe(all_vids_stats)
+    return all_videos, exportVideoData(vids_info) if export else vids_info
 
+
+def buildVideoListDataframe(api_key, video_ids, max_workers=None):
+    all_vids_stats = []
+
+    # 50-ID chunks are fetched concurrently and returned in order
+    for response in fetchVideoPages(api_key, video_ids, max_workers):
         for vid in response['items']:
-            thumbnail_url = vid['snippet']['thumbnails'].get('standard', {}).get('url', None)
-
-            vid_stats = {
-                'id': vid.get('id', None),
-                'title': vid['snippet'].get('title', None),
-                'published_date': vid['snippet'].get('publishedAt', None),
-                'tags': vid['snippet'].get('tags', []),
-                'duration': vid['contentDetails'].get('duration', None),
-                'view_count': vid['statistics'].get('viewCount', None),
-                'like_count': vid['statistics'].get('likeCount', None),
-                'favorite_count': vid['statistics'].get('favoriteCount', None),
-                'comment_count': vid['statistics'].get('commentCount', None),
-                'thumbnail': thumbnail_url
-            }
-            all_vids_stats.append(vid_stats)
+            all_vids_stats.append(parseVideoItem(vid))
+
+    return exportVideoData(videoStatsDataframe(all_vids_stats))
+
 
+def videoStatsDataframe(all_vids_stats):
     # create the dataframe
     vids_info = pd.DataFrame(all_vids_stats)
-    # Convert columns to numeric
-    numeric_columns = ['comment_count', 'like_count', 'view_count']
-    vids_info[numeric_columns] = vids_info[numeric_columns]\
-                                  .apply(pd.to_numeric, errors='coerce')
 
     # Function to convert ISO 8601 duration to minutes
     def iso8601_duration_to_minutes(duration):
@@ -234,14 +364,13 @@ def buildVideoListDataframe(api_key, video_ids):
     vids_info['duration_minutes'] = vids_info['duration']\
                                      .apply(iso8601_duration_to_minutes)
 
-    # Convert 'published_date' to a pandas datetime object
-    vids_info['published_date'] = pd.to_datetime(vids_info['published_date'])
+    # Cast counts, dates and strings to the canonical video schema; dates are formatted
+    # only where they are displayed
+    return apply_video_schema(vids_info)
 
-    # Format 'published_date'
-    vids_info['published_date'] = vids_info['published_date']\
-                                   .dt.strftime('%Y-%m-%d %I:%M:%S')
 
-    vids_info.to_excel("all_vids_info.xlsx", index=False)
+def exportVideoData(vids_info):
+    for_export(vids_info).to_excel("all_vids_info.xlsx", index=False)
 
     print(vids_info.head(5))
 
@@ -0,0 +1,107 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+# Directory holding one pickled comment dataset per video, order and reply mode
+COMMENT_CACHE_DIR = os.path.join(".cache", "comments")
+
+# Seconds a comment dataset is reused while the video's comment count is unchanged
+COMMENT_CACHE_TTL = 6 * 60 * 60
+
+# Comment datasets kept in memory across reruns and sessions
+MEMORY_ENTRIES = 16
+
+_lock = threading.Lock()
+_memory = OrderedDict()  # cache key -> entry, least recently used first
+
+
+def _cacheKey(video_id, order, fetch_all_replies):
+    return f"{video_id}-{order}-{'replies' if fetch_all_replies else 'threads'}"
+
+
+def _path(key):
+    return os.path.join(COMMENT_CACHE_DIR, key + ".pkl")
+
+
+def _commentCount(comment_count):
+    return None if pd.isna(comment_count) else int(comment_count)
+
+
+def _isFresh(entry, comment_count):
+    return entry["comment_count"] == _commentCount(comment_count) and \
+        time.time() - entry["stored_at"] < COMMENT_CACHE_TTL
+
+
+def _remember(key, entry):
+    with _lock:
+        _memory[key] = entry
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def _readDisk(key):
+    try:
+        with open(_path(key), "rb") as cache_file:
+            return pickle.load(cache_file)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def loadCachedComments(video_id, order, fetch_all_replies, comment_count):
+    """Returns the cached comments of a video, or None if there are none or they are stale.
+
+    A dataset goes stale when the video's comment_count differs from the count it was
+    fetched at or when it is older than COMMENT_CACHE_TTL.
+    """
+    key = _cacheKey(video_id, order, fetch_all_replies)
+
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None:
+            _memory.move_to_end(key)
+
+    if entry is None:
+        entry = _readDisk(key)
+        if entry is not None:
+            _remember(key, entry)
+
+    if entry is None or not _isFresh(entry, comment_count):
+        return None
+    return entry["data"]
+
+
+def saveCachedComments(video_id, order, fetch_all_replies, comment_count, data):
+    """Stores a video's comments in memory and on disk under its current comment count."""
+    key = _cacheKey(video_id, order, fetch_all_replies)
+    entry = {"comment_count": _commentCount(comment_count),
+             "stored_at": time.time(),
+             "data": data}
+    _remember(key, entry)
+
+    os.makedirs(COMMENT_CACHE_DIR, exist_ok=True)
+    temp_path = _path(key) + ".tmp"
+    with open(temp_path, "wb") as cache_file:
+        pickle.dump(entry, cache_file)
+    os.replace(temp_path, _path(key))
+
+
+def invalidateComments(video_id):
+    """Drops every cached comment dataset of a video."""
+    prefix = f"{video_id}-"
+
+    with _lock:
+        for key in [key for key in _memory if key.startswith(prefix)]:
+            del _memory[key]
+
+    if os.path.isdir(COMMENT_CACHE_DIR):
+        for entry in os.scandir(COMMENT_CACHE_DIR):
+            if entry.name.startswith(prefix) and entry.name.endswith(".pkl"):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
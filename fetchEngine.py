@@ -0,0 +1,158 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from googleapiclient.errors import HttpError
+
+from youtubeClient import getYoutubeClient
+from responseCache import cachedExecute
+from quotaScheduler import INTERACTIVE
+
+# Number of API requests allowed in flight at once
+MAX_WORKERS = int(os.environ.get("YOUTUBE_FETCH_WORKERS", 8))
+
+# videos().list accepts at most 50 IDs per call
+BATCH_SIZE = 50
+
+logger = logging.getLogger(__name__)
+
+
+def iterPlaylistPages(api_key, playlist_id, priority=INTERACTIVE, revalidate=False):
+    """Yields playlistItems responses page by page, newest uploads first.
+
+    revalidate=True asks the API about every page even while its cached copy is fresh.
+    """
+    youtube = getYoutubeClient(api_key)
+
+    next_page_token = None
+    while True:
+        request = youtube.playlistItems().list(part="contentDetails,snippet",
+                                               playlistId=playlist_id,
+                                               maxResults=50,
+                                               pageToken=next_page_token)
+        response = cachedExecute(request, priority, revalidate)
+        yield response
+
+        next_page_token = response.get('nextPageToken')
+        if next_page_token is None:
+            break
+
+
+def fetchVideoBatch(api_key, video_ids, priority=INTERACTIVE, revalidate=False):
+    """Fetches snippet, content details and statistics for up to 50 video IDs."""
+    youtube = getYoutubeClient(api_key)
+    request = youtube.videos().list(part='snippet,contentDetails,statistics',
+                                    id=','.join(video_ids))
+    return cachedExecute(request, priority, revalidate)
+
+
+def fetchVideoPages(api_key, video_ids, max_workers=None, priority=INTERACTIVE, revalidate=False):
+    """Fetches video statistics in 50-ID chunks concurrently, returning responses in input order."""
+    chunks = [video_ids[i:i + BATCH_SIZE] for i in range(0, len(video_ids), BATCH_SIZE)]
+
+    with ThreadPoolExecutor(max_workers=max_workers or MAX_WORKERS) as executor:
+        return list(executor.map(lambda chunk: fetchVideoBatch(api_key, chunk, priority, revalidate), chunks))
+
+
+def fetchUploadsWithStats(api_key, playlist_id, max_workers=None, priority=INTERACTIVE, revalidate=False):
+    """Walks an uploads playlist and fetches statistics for each page as soon as it lands.
+
+    Playlist pages have to be read one after another because each page holds the token
+    for the next one, but the statistics request for a page is handed to the worker pool
+    straight away so it overlaps with paging.
+
+    Returns:
+        (playlist_pages, video_pages) with both lists in playlist order.
+    """
+    playlist_pages = []
+    futures = []
+
+    with ThreadPoolExecutor(max_workers=max_workers or MAX_WORKERS) as executor:
+        for page in iterPlaylistPages(api_key, playlist_id, priority, revalidate):
+            playlist_pages.append(page)
+
+            video_ids = [item['contentDetails'].get('videoId', None) for item in page['items']]
+            video_ids = [video_id for video_id in video_ids if video_id is not None]
+
+            for i in range(0, len(video_ids), BATCH_SIZE):
+                futures.append(executor.submit(fetchVideoBatch, api_key, video_ids[i:i + BATCH_SIZE], priority,
+                                               revalidate))
+
+        video_pages = [future.result() for future in futures]
+
+    return playlist_pages, video_pages
+
+
+def fetchReplies(api_key, parent_id, priority=INTERACTIVE, deadline=None, revalidate=False):
+    """Fetches every reply to a top level comment, following reply pages until deadline.
+
+    deadline is a time.monotonic() value; the replies read so far are returned once it passes.
+    revalidate=True asks the API about every page even while its cached copy is fresh.
+    """
+    youtube = getYoutubeClient(api_key)
+    replies = []
+
+    page_token = None
+    while True:
+        request = youtube.comments().list(part="snippet",
+                                          parentId=parent_id,
+                                          maxResults=100,
+                                          textFormat='plainText',
+                                          pageToken=page_token)
+        response = cachedExecute(request, priority, revalidate)
+        replies.extend(response['items'])
+
+        page_token = response.get('nextPageToken')
+        if page_token is None or (deadline is not None and time.monotonic() >= deadline):
+            return replies
+
+
+def fetchAllReplies(api_key, parent_ids, max_workers=None, priority=INTERACTIVE, deadline=None, max_replies=None,
+                    revalidate=False):
+    """Fetches the full reply chains of many threads concurrently, within an optional budget.
+
+    New threads are only started while deadline (a time.monotonic() value) has not passed
+    and fewer than max_replies replies have arrived; chains already being paged stop at the
+    deadline as well. A thread whose replies cannot be fetched (e.g. one deleted while the
+    comments are read) is skipped instead of failing the others. revalidate is passed on to
+    fetchReplies.
+
+    Returns:
+        A list of (parent_id, replies) tuples in the order of parent_ids, for the threads
+        that were fetched.
+    """
+    max_workers = max_workers or MAX_WORKERS
+    remaining_ids = iter(parent_ids)
+    results = {}
+    fetched = 0
+
+    def withinBudget():
+        return (deadline is None or time.monotonic() < deadline) and \
+            (max_replies is None or fetched < max_replies)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        while True:
+            # keep every worker busy while the budget lasts
+            while len(pending) < max_workers and withinBudget():
+                parent_id = next(remaining_ids, None)
+                if parent_id is None:
+                    break
+                pending[executor.submit(fetchReplies, api_key, parent_id, priority, deadline,
+                                        revalidate)] = parent_id
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                parent_id = pending.pop(future)
+                try:
+                    results[parent_id] = future.result()
+                except HttpError as error:
+                    logger.warning("Skipping the replies of %s: %s", parent_id, error)
+                    continue
+                fetched += len(results[parent_id])
+
+    return [(parent_id, results[parent_id]) for parent_id in parent_ids if parent_id in results]
@@ -0,0 +1,313 @@
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Directory holding the fitted model and forecast of every fingerprint
+FORECAST_CACHE_DIR = os.path.join(".cache", "forecasts")
+
+# Days forecast past the last observation
+FORECAST_DAYS = 30
+
+DEFAULT_ENGINE = "smoothing"
+
+# Days of daily history the smoothing engine is fitted on
+FIT_WINDOW_DAYS = 2 * 365
+
+# Weekly seasonality on a daily series
+SEASON_LENGTH = 7
+
+PROPHET_PARAMS = {
+    "yearly_seasonality": False,
+    "weekly_seasonality": True,
+    "daily_seasonality": True,
+    "seasonality_mode": "additive",
+}
+
+# Forecasts kept in memory
+MEMORY_ENTRIES = 8
+
+_lock = threading.Lock()
+_forecasts = OrderedDict()  # fingerprint -> forecast frame, least recently used first
+_pending = {}  # fingerprint -> future of a running fit
+
+# one fit at a time, Stan already uses a core of its own
+_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="forecast")
+
+
+def daily_series(history):
+    """Resamples per-video ds/y points to one value per day.
+
+    Days with several uploads take their mean and days without one are interpolated,
+    so the series keeps the scale of views per video.
+    """
+    series = history.set_index(pd.to_datetime(history['ds']))['y'].astype(float)
+    series = series.resample('D').mean()
+    return series.interpolate(method='time').bfill()
+
+
+def holt_winters(y, alpha, beta, gamma, phi, level, trend, season):
+    """Runs additive damped-trend Holt-Winters over y.
+
+    Returns:
+        (fitted, level, trend, season) with the one-step-ahead predictions for y and the
+        final states, season holding the next SEASON_LENGTH seasonal terms in order.
+    """
+    season = list(season)
+    fitted = np.empty(len(y))
+
+    for t, value in enumerate(y):
+        seasonal = season[t % SEASON_LENGTH]
+        damped_trend = phi * trend
+        fitted[t] = level + damped_trend + seasonal
+
+        new_level = alpha * (value - seasonal) + (1 - alpha) * (level + damped_trend)
+        trend = beta * (new_level - level) + (1 - beta) * damped_trend
+        season[t % SEASON_LENGTH] = gamma * (value - level - damped_trend) + (1 - gamma) * seasonal
+        level = new_level
+
+    offset = len(y) % SEASON_LENGTH
+    return fitted, level, trend, season[offset:] + season[:offset]
+
+
+class SmoothingEngine:
+    """Damped-trend exponential smoothing with weekly seasonality, in NumPy and SciPy.
+
+    The model is fitted on log1p of the daily series so forecasts stay positive and a
+    few viral videos do not dominate the squared error.
+    """
+
+    name = "smoothing"
+
+    # alpha, beta, gamma, phi
+    BOUNDS = [(0.01, 0.99), (0.001, 0.5), (0.001, 0.5), (0.8, 0.98)]
+    START = [0.3, 0.05, 0.1, 0.9]
+
+    def fit(self, history, periods=FORECAST_DAYS):
+        from scipy.optimize import minimize
+
+        series = daily_series(history).iloc[-FIT_WINDOW_DAYS:]
+        y = np.log1p(series.clip(lower=0).to_numpy())
+
+        if len(y) < 2 * SEASON_LENGTH:
+            # too short for a seasonal fit, repeat the mean
+            level, trend, season = y.mean(), 0.0, [0.0] * SEASON_LENGTH
+            params = dict(alpha=0.0, beta=0.0, gamma=0.0, phi=0.0)
+            fitted = np.full(len(y), level)
+        else:
+            first_week, second_week = y[:SEASON_LENGTH], y[SEASON_LENGTH:2 * SEASON_LENGTH]
+            level = first_week.mean()
+            trend = (second_week.mean() - first_week.mean()) / SEASON_LENGTH
+            season = list(first_week - level)
+
+            def sse(values):
+                fitted = holt_winters(y, *values, level, trend, season)[0]
+                return np.square(y - fitted).sum()
+
+            result = minimize(sse, self.START, method="L-BFGS-B", bounds=self.BOUNDS)
+            params = dict(zip(["alpha", "beta", "gamma", "phi"], result.x.tolist()))
+            fitted, level, trend, season = holt_winters(y, *result.x, level, trend, season)
+
+        model = {"params": params,
+                 "level": float(level),
+                 "trend": float(trend),
+                 "season": [float(value) for value in season],
+                 "sigma": float(np.std(y - fitted)),
+                 "last_date": series.index[-1].isoformat()}
+
+        future = self.predict(model, periods)
+        past = pd.DataFrame({'ds': series.index, 'yhat': np.expm1(fitted)})
+        past['yhat_lower'] = np.expm1(fitted - 1.96 * model["sigma"])
+        past['yhat_upper'] = np.expm1(fitted + 1.96 * model["sigma"])
+
+        return model, pd.concat([past, future], ignore_index=True)
+
+    @staticmethod
+    def predict(model, periods=FORECAST_DAYS):
+        phi = model["params"]["phi"]
+        steps = np.arange(1, periods + 1)
+        damping = np.cumsum(phi ** steps)
+        season = np.resize(model["season"], periods)
+
+        yhat = model["level"] + damping * model["trend"] + season
+        # error variance grows with the horizon as the level absorbs alpha of each shock
+        spread = 1.96 * model["sigma"] * np.sqrt(1 + (steps - 1) * model["params"]["alpha"] ** 2)
+
+        return pd.DataFrame({
+            'ds': pd.Timestamp(model["last_date"]) + pd.to_timedelta(steps, unit='D'),
+            'yhat': np.expm1(yhat),
+            'yhat_lower': np.expm1(yhat - spread),
+            'yhat_upper': np.expm1(yhat + spread),
+        })
+
+    @staticmethod
+    def to_json(model):
+        return json.dumps(model)
+
+    @staticmethod
+    def from_json(text):
+        return json.loads(text)
+
+
+class ProphetEngine:
+    """Prophet fitted on the per-video points; imported only when it is used."""
+
+    name = "prophet"
+
+    def fit(self, history, periods=FORECAST_DAYS):
+        from prophet import Prophet
+
+        model = Prophet(**PROPHET_PARAMS)
+        model.fit(history[['ds', 'y']])
+
+        future_dates = model.make_future_dataframe(periods=periods)
+        forecast = model.predict(future_dates)[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+        return model, forecast
+
+    @staticmethod
+    def to_json(model):
+        from prophet.serialize import model_to_json
+        return model_to_json(model)
+
+    @staticmethod
+    def from_json(text):
+        from prophet.serialize import model_from_json
+        return model_from_json(text)
+
+
+ENGINES = {
+    "smoothing": SmoothingEngine,
+    "prophet": ProphetEngine,
+}
+
+
+def available_engines():
+    """Names of the engines that can run here; Prophet only when it is installed."""
+    return [name for name in ENGINES
+            if name != "prophet" or importlib.util.find_spec("prophet") is not None]
+
+
+def forecast_fingerprint(history, periods=FORECAST_DAYS, engine=DEFAULT_ENGINE):
+    """Hashes the ds/y series together with the horizon, the engine and its parameters."""
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(history[['ds', 'y']], index=False).values.tobytes())
+    digest.update(json.dumps([periods, engine, PROPHET_PARAMS if engine == "prophet" else FIT_WINDOW_DAYS],
+                             sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _path(name):
+    return os.path.join(FORECAST_CACHE_DIR, name)
+
+
+def _remember(fingerprint, forecast):
+    with _lock:
+        _forecasts[fingerprint] = forecast
+        _forecasts.move_to_end(fingerprint)
+        while len(_forecasts) > MEMORY_ENTRIES:
+            _forecasts.popitem(last=False)
+
+
+def _cached_forecast(fingerprint):
+    with _lock:
+        if fingerprint in _forecasts:
+            _forecasts.move_to_end(fingerprint)
+            return _forecasts[fingerprint]
+
+    try:
+        forecast = pd.read_pickle(_path(f"{fingerprint}.pkl"))
+    except FileNotFoundError:
+        return None
+    _remember(fingerprint, forecast)
+    return forecast
+
+
+def _latest_fingerprints():
+    try:
+        with open(_path("latest.json"), "r", encoding="utf-8") as latest_file:
+            return json.load(latest_file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _set_latest(series_key, fingerprint):
+    with _lock:
+        latest = _latest_fingerprints()
+        latest[series_key] = fingerprint
+        temp_path = _path("latest.json.tmp")
+        with open(temp_path, "w", encoding="utf-8") as latest_file:
+            json.dump(latest, latest_file)
+        os.replace(temp_path, _path("latest.json"))
+
+
+def fit_forecast(history, periods=FORECAST_DAYS, engine=DEFAULT_ENGINE):
+    """Fits an engine on a ds/y frame and returns (model, forecast) for the next periods days.
+
+    forecast has ds, yhat, yhat_lower and yhat_upper columns covering the history and
+    the forecast horizon.
+    """
+    return ENGINES[engine]().fit(history, periods)
+
+
+def _fit_and_store(series_key, fingerprint, history, periods, engine):
+    try:
+        model, forecast = fit_forecast(history, periods, engine)
+
+        os.makedirs(FORECAST_CACHE_DIR, exist_ok=True)
+        with open(_path(f"{fingerprint}.json"), "w", encoding="utf-8") as model_file:
+            json.dump({"engine": engine, "model": ENGINES[engine].to_json(model)}, model_file)
+        forecast.to_pickle(_path(f"{fingerprint}.pkl"))
+
+        _remember(fingerprint, forecast)
+        _set_latest(series_key, fingerprint)
+        return forecast
+    finally:
+        with _lock:
+            _pending.pop(fingerprint, None)
+
+
+def load_model(fingerprint):
+    """Returns the fitted model stored under a fingerprint, or None."""
+    try:
+        with open(_path(f"{fingerprint}.json"), "r", encoding="utf-8") as model_file:
+            stored = json.load(model_file)
+    except (FileNotFoundError, ValueError):
+        return None
+    return ENGINES[stored["engine"]].from_json(stored["model"])
+
+
+def get_forecast(history, series_key, periods=FORECAST_DAYS, engine=DEFAULT_ENGINE):
+    """Returns the forecast for a ds/y series, fitting it in the background when needed.
+
+    Forecasts are cached in memory and on disk under forecast_fingerprint. When the
+    series changed, a refit is started on the background worker and the last forecast
+    of the same series_key (e.g. the channel ID and engine) is returned until it
+    finishes. Only a series that was never forecast before waits for its fit.
+
+    Returns:
+        (forecast, is_current) where is_current is False while a newer fit is running.
+    """
+    fingerprint = forecast_fingerprint(history, periods, engine)
+
+    forecast = _cached_forecast(fingerprint)
+    if forecast is not None:
+        return forecast, True
+
+    with _lock:
+        future = _pending.get(fingerprint)
+        if future is None:
+            future = _worker.submit(_fit_and_store, series_key, fingerprint, history.copy(), periods, engine)
+            _pending[fingerprint] = future
+
+    previous = _latest_fingerprints().get(series_key)
+    forecast = _cached_forecast(previous) if previous is not None else None
+    if forecast is not None:
+        return forecast, False
+
+    return future.result(), True
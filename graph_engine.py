@@ -0,0 +1,427 @@
+import hashlib
+import importlib.util
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import networkx as nx
+
+# igraph is optional, networkx covers every metric; it is imported on first use
+ig = None
+
+# Graphs with at least this many nodes use igraph when it is installed
+IGRAPH_MIN_NODES = 200
+
+# Seconds spent on sampled betweenness and closeness when no target is given
+DEFAULT_TIME_BUDGET = 5.0
+
+# Sampling stops paying off once the sample is this share of the graph
+EXACT_PIVOT_SHARE = 0.5
+
+# Pivots timed to estimate how many fit in a time budget, and the fewest ever used
+PROBE_PIVOTS = 5
+MIN_PIVOTS = 10
+
+# Layouts kept in memory, keyed by the content hash of a graph's edge list
+LAYOUT_CACHE_SIZE = 64
+
+CENTRALITY_COLUMNS = ['Author', 'Degree Centrality', 'In-Degree Centrality', 'Out-Degree Centrality',
+                      'Betweenness Centrality', 'Closeness Centrality']
+
+
+_layout_lock = threading.Lock()
+_layouts = OrderedDict()  # edge list hash -> {node: (x, y)}, least recently used first
+
+# igraph has one random number generator per process, shared by every session's thread
+_igraph_rng_lock = threading.Lock()
+
+
+def igraph_available():
+    """Whether igraph is installed, without paying for its import."""
+    return ig is not None or importlib.util.find_spec("igraph") is not None
+
+
+def load_igraph():
+    """Imports igraph the first time an engine needs it."""
+    global ig
+
+    if ig is None:
+        import igraph
+        ig = igraph
+    return ig
+
+
+@contextmanager
+def igraph_seed(seed):
+    """Seeds igraph's global random number generator for the duration of a block.
+
+    The generator is process wide, so seeded blocks run one at a time; otherwise one
+    block restoring the default generator would un-seed another that is still running.
+    """
+    with _igraph_rng_lock:
+        ig.set_random_number_generator(random.Random(seed))
+        try:
+            yield
+        finally:
+            ig.set_random_number_generator(random)
+
+
+def centrality_frame(nodes, degree, in_degree, out_degree, betweenness, closeness):
+    return pd.DataFrame({
+        'Author': list(nodes),
+        'Degree Centrality': degree,
+        'In-Degree Centrality': in_degree,
+        'Out-Degree Centrality': out_degree,
+        'Betweenness Centrality': betweenness,
+        'Closeness Centrality': closeness
+    }, columns=CENTRALITY_COLUMNS).sort_values(by='Degree Centrality', ascending=False, kind='stable')
+
+
+def undirected_weights(G):
+    """Collapses the reply graph to undirected edges, summing replies in both directions."""
+    U = nx.Graph()
+    U.add_nodes_from(G)
+    for u, v, weight in G.edges(data='weight', default=1):
+        if U.has_edge(u, v):
+            U[u][v]['weight'] += weight
+        else:
+            U.add_edge(u, v, weight=weight)
+    return U
+
+
+def community_ids(nodes, communities):
+    """Maps each node to a community ID, numbering communities from the largest down."""
+    communities = sorted(communities, key=len, reverse=True)
+    membership = {node: community_id for community_id, community in enumerate(communities)
+                  for node in community}
+    return [membership[node] for node in nodes]
+
+
+def sampled_closeness(n, pivots, distance_rows):
+    """Estimates networkx closeness from distances out of a sample of pivot nodes.
+
+    distance_rows yields one array per pivot with the distance from the pivot to every
+    node (inf where unreachable). For each node, the share of pivots that reach it stands
+    in for the share of the graph that reaches it, and the mean pivot distance for its
+    mean incoming distance, mirroring the Wasserman-Faust formula networkx uses.
+    """
+    reached = np.zeros(n)
+    distance_sum = np.zeros(n)
+    for distances in distance_rows:
+        reachable = np.isfinite(distances) & (distances > 0)
+        reached += reachable
+        distance_sum += np.where(reachable, distances, 0)
+
+    other_pivots = np.full(n, float(len(pivots)))
+    other_pivots[pivots] -= 1
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        closeness = (reached / distance_sum) * (reached / other_pivots)
+    return np.nan_to_num(closeness)
+
+
+class NetworkXEngine:
+    """Pure Python centralities, exact and dependable on small graphs."""
+
+    name = "networkx"
+
+    def centrality(self, G, pivots=None):
+        nodes = list(G.nodes())
+        n = len(nodes)
+        degree_centrality = nx.degree_centrality(G)
+        in_degree_centrality = nx.in_degree_centrality(G)
+        out_degree_centrality = nx.out_degree_centrality(G)
+
+        if pivots is None:
+            betweenness_centrality = nx.betweenness_centrality(G)
+            closeness_centrality = nx.closeness_centrality(G)
+            betweenness = [betweenness_centrality[node] for node in nodes]
+            closeness = [closeness_centrality[node] for node in nodes]
+        else:
+            pivot_nodes = [nodes[i] for i in pivots]
+
+            # pivot sampled betweenness, scaled like nx.betweenness_centrality(G, k=...)
+            betweenness_centrality = nx.betweenness_centrality_subset(G, pivot_nodes, nodes, normalized=False)
+            scale = n / (len(pivots) * (n - 1) * (n - 2))
+            betweenness = [betweenness_centrality[node] * scale for node in nodes]
+
+            index = {node: i for i, node in enumerate(nodes)}
+
+            def distance_rows():
+                for pivot in pivot_nodes:
+                    distances = np.full(n, np.inf)
+                    for node, length in nx.single_source_shortest_path_length(G, pivot).items():
+                        distances[index[node]] = length
+                    yield distances
+
+            closeness = sampled_closeness(n, pivots, distance_rows())
+
+        return centrality_frame(nodes,
+                                [degree_centrality[node] for node in nodes],
+                                [in_degree_centrality[node] for node in nodes],
+                                [out_degree_centrality[node] for node in nodes],
+                                betweenness,
+                                closeness)
+
+    def communities(self, G, seed=42):
+        U = undirected_weights(G)
+        if U.number_of_edges() == 0:
+            # modularity is undefined without edges; every commenter is a community of one
+            return community_ids(list(G.nodes()), [[node] for node in G.nodes()]), 0.0
+
+        communities = nx.community.louvain_communities(U, weight='weight', seed=seed)
+        modularity = nx.community.modularity(U, communities, weight='weight')
+        return community_ids(list(G.nodes()), communities), modularity
+
+    def layout(self, G, seed=42):
+        pos = nx.spring_layout(G, seed=seed)
+        return np.array([pos[node] for node in G.nodes()], dtype=float).reshape(-1, 2)
+
+
+class IGraphEngine:
+    """Compiled igraph centralities, normalised to match the networkx definitions."""
+
+    name = "igraph"
+
+    # pivots whose distance rows are materialised at once
+    PIVOT_CHUNK = 64
+
+    @staticmethod
+    def to_igraph(G):
+        nodes = list(G.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+        edges = [(index[u], index[v]) for u, v in G.edges()]
+        return nodes, ig.Graph(n=len(nodes), edges=edges, directed=G.is_directed())
+
+    def centrality(self, G, pivots=None):
+        n = G.number_of_nodes()
+        if n <= 2:
+            # networkx special-cases the normalisation of tiny graphs
+            return NetworkXEngine().centrality(G)
+
+        nodes, g = self.to_igraph(G)
+        scale = 1.0 / (n - 1)
+
+        degree = np.array(g.degree(mode="all"), dtype=float) * scale
+        in_degree = np.array(g.degree(mode="in"), dtype=float) * scale
+        out_degree = np.array(g.degree(mode="out"), dtype=float) * scale
+
+        if pivots is None:
+            betweenness = np.array(g.betweenness(directed=True), dtype=float) / ((n - 1) * (n - 2))
+
+            # networkx uses distances *to* each node and the Wasserman-Faust correction for
+            # nodes that only a part of the graph can reach
+            closeness = np.array(g.closeness(mode="in", normalized=True), dtype=float)
+            reachable = np.array(g.neighborhood_size(order=n, mode="in"), dtype=float) - 1
+            closeness = np.nan_to_num(closeness) * reachable / (n - 1)
+        else:
+            pivots = [int(pivot) for pivot in pivots]
+
+            # shortest paths out of the pivots only, scaled like networkx's k-sampling
+            betweenness = np.array(g.betweenness(directed=True, sources=pivots), dtype=float)
+            betweenness *= n / (len(pivots) * (n - 1) * (n - 2))
+
+            def distance_rows():
+                for i in range(0, len(pivots), self.PIVOT_CHUNK):
+                    yield from np.array(g.distances(source=pivots[i:i + self.PIVOT_CHUNK], mode="out"),
+                                        dtype=float)
+
+            closeness = sampled_closeness(n, pivots, distance_rows())
+
+        return centrality_frame(nodes, degree, in_degree, out_degree, betweenness, closeness)
+
+    def communities(self, G, seed=42):
+        U = undirected_weights(G)
+        nodes, g = self.to_igraph(U)
+        weights = [weight for _, _, weight in U.edges(data='weight')]
+
+        with igraph_seed(seed):
+            partition = g.community_leiden(objective_function="modularity", weights=weights, n_iterations=-1)
+
+        # igraph reports NaN for graphs without edges
+        modularity = g.modularity(partition.membership, weights=weights)
+        modularity = 0.0 if np.isnan(modularity) else modularity
+        communities = [[nodes[i] for i in community] for community in partition]
+        return community_ids(list(G.nodes()), communities), modularity
+
+    def layout(self, G, seed=42):
+        _, g = self.to_igraph(G)
+        with igraph_seed(seed):
+            coords = g.layout_fruchterman_reingold()
+        return np.array(coords.coords, dtype=float).reshape(-1, 2)
+
+
+ENGINES = {
+    "networkx": NetworkXEngine,
+    "igraph": IGraphEngine,
+}
+
+
+def select_engine(G, engine="auto"):
+    """Returns the engine for a graph: igraph for larger graphs when it is installed."""
+    if engine == "auto":
+        engine = "igraph" if igraph_available() and G.number_of_nodes() >= IGRAPH_MIN_NODES else "networkx"
+    if engine == "igraph":
+        if not igraph_available():
+            raise ImportError("The igraph engine needs the 'igraph' package.")
+        load_igraph()
+    return ENGINES[engine]()
+
+
+def accuracy_pivots(n, accuracy):
+    """Pivots the Hoeffding bound in pivot_count asks for on an n node graph."""
+    return int(np.ceil(np.log(2 * n / 0.1) / (2 * accuracy ** 2)))
+
+
+def sampling_threshold(accuracy):
+    """Smallest graph (in nodes) on which an accuracy target is met by sampling.
+
+    The bound grows with ln(n) and 1 / accuracy^2, so tight targets only sample on very
+    large graphs; below this size compute_centrality returns exact scores.
+    """
+    def samples(n):
+        return accuracy_pivots(n, accuracy) < n * EXACT_PIVOT_SHARE
+
+    high = 4
+    while not samples(high):
+        high *= 2
+    low = high // 2
+    while high - low > 1:
+        middle = (low + high) // 2
+        low, high = (low, middle) if samples(middle) else (middle, high)
+    return high
+
+
+def pivot_order(n, seed=42):
+    """Seeded order in which nodes are drawn as pivots; any k pivots are its first k."""
+    return np.random.default_rng(seed).permutation(n)
+
+
+def pivot_count(G, engine, accuracy=None, time_budget=None, seed=42):
+    """Number of pivots that meets an accuracy target or fits in a time budget.
+
+    accuracy is the largest absolute error wanted on any normalised score; by Hoeffding's
+    bound with a union over all nodes, ln(2n / 0.1) / (2 * accuracy^2) pivots keep every
+    estimate within it with 90% probability. time_budget is in seconds and covers the
+    probe too: a run on the first PROBE_PIVOTS pivots of pivot_order is timed, and what
+    is left of the budget is spent at the probe's cost per pivot. That cost includes the
+    probe's fixed overhead, which a run with more pivots pays only once, so the estimate
+    errs on the short side. At least MIN_PIVOTS are returned even if the probe used up
+    the budget.
+    """
+    n = G.number_of_nodes()
+
+    if accuracy is not None:
+        return accuracy_pivots(n, accuracy)
+
+    probe = np.sort(pivot_order(n, seed)[:PROBE_PIVOTS])
+    start = time.perf_counter()
+    engine.centrality(G, probe)
+    probe_seconds = time.perf_counter() - start
+
+    remaining = time_budget - probe_seconds
+    return max(int(remaining / (probe_seconds / len(probe))), MIN_PIVOTS)
+
+
+def compute_centrality(G, engine="auto", approximate=False, accuracy=None, time_budget=None, seed=42):
+    """Returns degree, in/out-degree, betweenness and closeness centrality per author.
+
+    With approximate=True, betweenness and closeness are estimated from shortest paths
+    out of a seeded random sample of pivot nodes, sized by either an accuracy target or a
+    time budget in seconds (DEFAULT_TIME_BUDGET if neither is given). When the sample
+    would cover EXACT_PIVOT_SHARE of the graph or more, the exact values are computed
+    instead since they cost about the same.
+
+    The returned frame's attrs['centrality_modes'] says which mode produced each column.
+    """
+    engine = select_engine(G, engine)
+    n = G.number_of_nodes()
+
+    pivots = None
+    if approximate and n > 2:
+        if accuracy is None and time_budget is None:
+            time_budget = DEFAULT_TIME_BUDGET
+        k = pivot_count(G, engine, accuracy, time_budget, seed)
+        if k < n * EXACT_PIVOT_SHARE:
+            # the time budget probe drew the first pivots of the same order, so they are reused
+            pivots = np.sort(pivot_order(n, seed)[:k])
+
+    centrality_df = engine.centrality(G, pivots)
+
+    sampled_mode = "exact" if pivots is None else f"approximate ({len(pivots):,} of {n:,} pivots, seed {seed})"
+    centrality_df.attrs['centrality_modes'] = {
+        'Degree Centrality': "exact",
+        'In-Degree Centrality': "exact",
+        'Out-Degree Centrality': "exact",
+        'Betweenness Centrality': sampled_mode,
+        'Closeness Centrality': sampled_mode,
+    }
+    centrality_df.attrs['engine'] = engine.name
+
+    return centrality_df
+
+
+def detect_communities(G, engine="auto", seed=42):
+    """Partitions the whole reply graph with Louvain (networkx) or Leiden (igraph).
+
+    Replies are treated as undirected ties weighted by how often two authors replied to
+    each other. Community IDs are numbered from the largest community down.
+
+    Returns:
+        (membership, modularity) where membership maps each author to a community ID.
+    """
+    membership, modularity = select_engine(G, engine).communities(G, seed)
+    return dict(zip(G.nodes(), membership)), modularity
+
+
+def edge_list_hash(G):
+    """Content hash of a graph's nodes and edges, independent of insertion order."""
+    nodes = sorted(map(str, G.nodes()))
+    edges = sorted((str(u), str(v)) for u, v in G.edges())
+    raw = json.dumps([G.is_directed(), nodes, edges])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def compute_layout(G, engine="auto", seed=42):
+    """Returns node positions for drawing a graph, as {node: (x, y)} scaled to [-1, 1].
+
+    Layouts are force-directed (Fruchterman-Reingold in igraph, spring_layout in
+    networkx) and seeded, so the same graph always gets the same picture. They are
+    cached in memory under edge_list_hash, and reruns that draw an unchanged graph
+    reuse the stored positions instead of laying it out again.
+    """
+    if engine == "auto" and igraph_available():
+        # the compiled layout pays off at any size
+        engine = "igraph"
+    engine = select_engine(G, engine)
+    key = f"{engine.name}:{seed}:{edge_list_hash(G)}"
+
+    with _layout_lock:
+        if key in _layouts:
+            _layouts.move_to_end(key)
+            return _layouts[key]
+
+    # lay out a copy with nodes in sorted order so the result does not depend on insertion order
+    H = nx.DiGraph() if G.is_directed() else nx.Graph()
+    H.add_nodes_from(sorted(G.nodes(), key=str))
+    H.add_edges_from(sorted(G.edges(), key=lambda edge: (str(edge[0]), str(edge[1]))))
+
+    coords = engine.layout(H, seed) if H.number_of_nodes() else np.empty((0, 2))
+    if len(coords):
+        coords = coords - coords.mean(axis=0)
+        extent = np.abs(coords).max()
+        if extent > 0:
+            coords = coords / extent
+    pos = {node: (float(x), float(y)) for node, (x, y) in zip(H.nodes(), coords)}
+
+    with _layout_lock:
+        _layouts[key] = pos
+        while len(_layouts) > LAYOUT_CACHE_SIZE:
+            _layouts.popitem(last=False)
+
+    return pos
@@ -0,0 +1,129 @@
+"""Headless ingestion of YouTube channels into the local channel store.
+
+    python -m ingest --channel UC... --channel UC... --interval 1h
+    python -m ingest --channels-file channels.txt --interval 30m
+
+Each run syncs the channels incrementally with background priority and writes their
+videos and channel details to the store in STORE_DIR. The Streamlit pages read from
+that store, so page loads do not wait on the YouTube API. The API key is taken from
+--api-key or the YOUTUBE_API_KEY environment variable. Without --interval the channels
+are synced once.
+
+The quota budget is tracked per process: the worker and the dashboard each count their
+own calls against YOUTUBE_DAILY_QUOTA and do not see each other's usage. When both use
+the same API key, set YOUTUBE_DAILY_QUOTA for each so the shares add up to the key's
+real daily quota, e.g. 6000 for the worker and 4000 for the dashboard.
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+
+from googleapiclient.errors import HttpError
+
+from channelSync import syncChannelDatasets, STORE_DIR
+from quotaScheduler import BACKGROUND, QuotaExceeded, TRANSPORT_ERRORS, quotaReport
+
+INTERVAL_UNITS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+logger = logging.getLogger("ingest")
+
+
+def parseInterval(text):
+    """Seconds in an interval such as 90s, 30m, 1h or 1d; a bare number is seconds."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", text.lower())
+    if match is None or float(match.group(1)) <= 0:
+        raise argparse.ArgumentTypeError(f"invalid interval {text!r}, expected e.g. 90s, 30m, 1h or 1d")
+    return float(match.group(1)) * INTERVAL_UNITS[match.group(2) or "s"]
+
+
+def readChannelIds(channels, channels_file=None):
+    """Channel IDs from --channel values (comma separated allowed) and a file with one per line.
+
+    Blank lines and lines starting with # are skipped; duplicates are dropped.
+    """
+    channel_ids = [channel_id for value in channels for channel_id in value.split(",")]
+
+    if channels_file is not None:
+        with open(channels_file, "r", encoding="utf-8") as ids_file:
+            channel_ids += [line.split("#", 1)[0] for line in ids_file]
+
+    return list(dict.fromkeys(channel_id.strip() for channel_id in channel_ids if channel_id.strip()))
+
+
+def runIngest(api_key, channel_ids, full=False):
+    """Syncs the channels once into their stores.
+
+    Returns:
+        dict of channel ID -> error message for the channels that could not be synced.
+    """
+    start = time.monotonic()
+    try:
+        # channel statistics are refreshed every run, not only when their cache entry expires
+        channel_details, datasets, failed = syncChannelDatasets(api_key, channel_ids, full=full,
+                                                                priority=BACKGROUND, revalidate=True)
+    except (QuotaExceeded, HttpError, *TRANSPORT_ERRORS) as error:
+        # the channel details could not be resolved, so no channel was synced
+        logger.error("Ingest failed: %s", error)
+        return {channel_id: str(error) for channel_id in channel_ids}
+
+    for channel_id, video_data in datasets.items():
+        logger.info("Synced %s (%s): %d videos", channel_id, channel_details[channel_id]["title"], len(video_data))
+    for channel_id, message in failed.items():
+        logger.warning("Could not sync %s: %s", channel_id, message)
+
+    units = int(quotaReport()["units"].sum())
+    logger.info("Synced %d of %d channels in %.1fs, %d quota units used by this process",
+                len(datasets), len(channel_ids), time.monotonic() - start, units)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m ingest",
+                                     description="Sync YouTube channels into the local store read by the dashboard.")
+    parser.add_argument("--channel", action="append", default=[], metavar="CHANNEL_ID",
+                        help="channel ID to sync, may be repeated or comma separated")
+    parser.add_argument("--channels-file", help="file with one channel ID per line")
+    parser.add_argument("--api-key", default=os.environ.get("YOUTUBE_API_KEY"),
+                        help="YouTube Data API key (default: $YOUTUBE_API_KEY)")
+    parser.add_argument("--interval", type=parseInterval,
+                        help="sync again after this long, e.g. 30m or 1h (default: sync once)")
+    parser.add_argument("--full", action="store_true",
+                        help="download every upload again instead of syncing incrementally")
+    args = parser.parse_args(argv)
+
+    channel_ids = readChannelIds(args.channel, args.channels_file)
+    if not channel_ids:
+        parser.error("no channels given, use --channel or --channels-file")
+    if not args.api_key:
+        parser.error("no API key given, use --api-key or set YOUTUBE_API_KEY")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logger.info("Ingesting %d channels into %s", len(channel_ids), os.path.abspath(STORE_DIR))
+
+    full = args.full
+    try:
+        while True:
+            started = time.monotonic()
+            try:
+                failed = runIngest(args.api_key, channel_ids, full=full)
+            except TRANSPORT_ERRORS as error:
+                # e.g. the store directory became unwritable; try again next interval
+                logger.error("Ingest run failed: %s", error)
+                failed = {channel_id: str(error) for channel_id in channel_ids}
+
+            if args.interval is None:
+                return 1 if failed else 0
+
+            # only the first run downloads everything again
+            full = False
+            time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        logger.info("Stopped")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
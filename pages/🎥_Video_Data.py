@@ -5,21 +5,48 @@ import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 from streamlit_extras.chart_container import chart_container
-from textblob import TextBlob
 
 from streamlit_extras.metric_cards import style_metric_cards
 from streamlit_extras.switch_page_button import switch_page
 
 from analyze_comments import analyze_comments
+from graph_engine import sampling_threshold
+from commentCache import loadCachedComments, saveCachedComments, invalidateComments
 from channelVideoDataExtraction import *
+from quotaScheduler import QuotaExceeded
+from sentiment import analyze_sentiment
+from video_schema import format_count, format_published
+from googleapiclient.errors import HttpError
+
+
+# Longest time one comment fetch may keep the page waiting, in seconds
+COMMENT_FETCH_SECONDS = 20
 
 
 ########################################################################################################################
 #                                       FUNCTIONS
 ########################################################################################################################
-def get_comments():
-    comment_data = getVideoComments(api_key, video_id)
-    return comment_data
+def get_comments(order, fetch_all_replies=False, load_more=False):
+    # comments are cached per video until its comment count changes or the cache expires,
+    # and "Load more" extends the cached set from the saved page token
+    comments = loadCachedComments(video_id, order, fetch_all_replies, comment_count)
+
+    # a missing or stale dataset means the comments changed, so the API pages kept by the
+    # response cache are out of date as well and every page is asked for again
+    if comments is None:
+        comments = getVideoComments(api_key, video_id, order=order,
+                                    max_seconds=COMMENT_FETCH_SECONDS,
+                                    fetch_all_replies=fetch_all_replies, revalidate=True)
+    elif load_more:
+        more_comments = getVideoComments(api_key, video_id, order=order,
+                                         max_seconds=COMMENT_FETCH_SECONDS, resume=True,
+                                         fetch_all_replies=fetch_all_replies, revalidate=True)
+        comments = mergeCommentData(comments, more_comments)
+    else:
+        return comments.copy()
+
+    saveCachedComments(video_id, order, fetch_all_replies, comment_count, comments)
+    return comments.copy()
 
 
 def tag_list(tags):
@@ -58,20 +85,20 @@ else:
 
     video_row = all_video_data[all_video_data['id'] == video_id]
 
-    title = video_row['title'].values[0]
-    image_url = video_row['thumbnail'].values[0]
-    view_count = video_row['view_count'].values[0]
-    like_count = video_row['like_count'].values[0]
-    favourite_count = video_row['favorite_count'].values[0]
-    comment_count = video_row['comment_count'].values[0]
-    duration = round(video_row['duration_minutes'].values[0], 2)
-    publish_date = video_row['published_date'].values[0]
-    tags = video_row['tags'].values[0]
+    title = video_row['title'].iloc[0]
+    image_url = video_row['thumbnail'].iloc[0]
+    view_count = video_row['view_count'].iloc[0]
+    like_count = video_row['like_count'].iloc[0]
+    favourite_count = video_row['favorite_count'].iloc[0]
+    comment_count = video_row['comment_count'].iloc[0]
+    duration = round(float(video_row['duration_minutes'].iloc[0]), 2)
+    publish_date = video_row['published_date'].iloc[0]
+    tags = video_row['tags'].iloc[0]
 
     # Format view count and subscriber count with commas
-    view_count_formatted = "{:,}".format(view_count)
-    like_count_formatted = "{:,}".format(like_count)
-    comment_count_formatted = "{:,}".format(comment_count)
+    view_count_formatted = format_count(view_count)
+    like_count_formatted = format_count(like_count)
+    comment_count_formatted = format_count(comment_count)
 
     st.subheader(title, divider="green")
 
@@ -79,7 +106,7 @@ else:
 
     with col1:
         st.image(image_url)
-        st.markdown(f"**Published on:**  {publish_date}")
+        st.markdown(f"**Published on:**  {format_published(publish_date)}")
 
     with col2:
         col2.metric("Total Views", view_count_formatted, "")
@@ -121,8 +148,31 @@ else:
 
     st.subheader("Top 10 Comments", divider="green")
 
+    col1, col2 = st.columns(2)
+    with col1:
+        comment_order = st.radio("Fetch comments by", ["time", "relevance"], horizontal=True)
+        fetch_all_replies = st.checkbox("Fetch full reply chains",
+                                        help="Busy threads only include their first few replies. "
+                                             "This fetches the rest for the network analysis.")
+    with col2:
+        checkpoint = getCommentCheckpoint(video_id, comment_order, fetch_all_replies)
+        load_more = st.button("Load more comments",
+                              disabled=checkpoint is not None and checkpoint["complete"])
+        if st.button("Refresh comments"):
+            # every cached order and reply mode of this video is fetched again from page one
+            invalidateComments(video_id)
+            load_more = False
+
     with st.spinner("Getting Comment Data...."):
-        comment_data = get_comments()
+        try:
+            comment_data = get_comments(comment_order, fetch_all_replies, load_more)
+        except QuotaExceeded as error:
+            st.error(f"{error} Please try again after the quota resets at midnight Pacific time.")
+            st.stop()
+        except HttpError as error:
+            # e.g. comments are disabled on this video or it was removed
+            st.warning(f"The comments could not be loaded, the YouTube API returned an error: {error.reason}")
+            st.stop()
         top_10_comments_df = comment_data.head(10)
         st.table(top_10_comments_df)
 
@@ -168,18 +218,8 @@ else:
         st.plotly_chart(fig, use_container_width=True)
 
     with col2:
-        def get_sentiment(text):
-            analysis = TextBlob(text)
-            # Classify the polarity of the text
-            if analysis.sentiment.polarity > 0:
-                return 'Positive'
-            elif analysis.sentiment.polarity == 0:
-                return 'Neutral'
-            else:
-                return 'Negative'
-
-
-        comment_data['Sentiment'] = comment_data['comment_text'].apply(get_sentiment)
+        # Scores are memoized per comment text, so reruns only score new comments
+        comment_data[['polarity', 'Sentiment']] = analyze_sentiment(comment_data['comment_text'])
         sentiment_counts = comment_data['Sentiment'].value_counts()
 
         with chart_container(comment_data):
@@ -195,15 +235,33 @@ else:
 ########################################################################################################################
 #                                       COMMENT NETWORK ANALYSIS
 ########################################################################################################################
+    st.title("Comments Network Analysis & Community Detection")
+
+    # Betweenness and closeness can be sampled on large comment graphs
+    centrality_mode = st.radio("Betweenness & Closeness Computation",
+                               ["Exact", "Time Budget", "Accuracy Target"], horizontal=True)
+    centrality_options = {}
+    if centrality_mode == "Time Budget":
+        centrality_options = {"approximate": True,
+                              "time_budget": st.slider("Seconds to spend", 1, 60, 5)}
+    elif centrality_mode == "Accuracy Target":
+        centrality_options = {"approximate": True,
+                              "accuracy": st.select_slider("Largest absolute error per score",
+                                                           [0.1, 0.05, 0.02, 0.01], 0.05)}
+        st.caption(f"Scores are sampled once the comment graph has about "
+                   f"{sampling_threshold(centrality_options['accuracy']):,} authors or more at this "
+                   f"target; smaller graphs get exact scores.")
+
     with st.spinner("Applying Network Analysis to Comments"):
         # Analyze the comments and display the results
-        st.title("Comments Network Analysis & Community Detection")
-
-        centrality_df, fig_subgraph, fig_communities, no_of_communities = analyze_comments(comment_data)
+        centrality_df, fig_subgraph, fig_communities, no_of_communities = analyze_comments(comment_data,
+                                                                                           **centrality_options)
+        centrality_modes = centrality_df.attrs['centrality_modes']
 
         # Display the centrality measures within an expander
         with st.expander("Top 10 Comment Author Centrality Measures"):
             st.table(centrality_df.head(10))
+            st.caption(" | ".join(f"{column}: {mode}" for column, mode in centrality_modes.items()))
 
         st.subheader("📊 Network Insights")
 
@@ -235,10 +293,11 @@ else:
             # Display the subgraph visualization with a brief title/description
             st.subheader("🔗 Sub Network Visualization")
             st.caption("Top 50 Authors based on Degree Centrality")
-            st.pyplot(fig_subgraph)
+            st.plotly_chart(fig_subgraph, use_container_width=True)
 
         with col2:
             # Display the communities visualization with a brief title/description
             st.subheader("👥 Community Visualization")
-            st.caption(f"Communities in Sample of 500 Nodes: {no_of_communities} detected")
-            st.pyplot(fig_communities)
+            st.caption(f"{no_of_communities} communities detected across all commenters "
+                       f"(modularity {centrality_df.attrs['modularity']:.2f}), largest shown")
+            st.plotly_chart(fig_communities, use_container_width=True)
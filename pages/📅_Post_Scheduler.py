@@ -2,13 +2,14 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 
+from video_schema import apply_video_schema, DISPLAY_DATE_FORMAT
+
 
 ########################################################################################################################
 #                                       FUNCTIONS
 ########################################################################################################################
 # Function to suggest the next publishing date
 def suggest_next_publish_date(video_data):
-    video_data['published_date'] = pd.to_datetime(video_data['published_date'])
     df_sorted = video_data.sort_values(by='published_date', ascending=False)
     average_diff = (df_sorted['published_date'] - df_sorted['published_date'].shift(-1)).mean()
     return df_sorted['published_date'].iloc[0] + average_diff
@@ -35,8 +36,11 @@ st.set_page_config(page_title="Content Publishing Calender",
                    page_icon="📊",
                    layout="wide")
 
-# Load video data
-video_data = pd.read_excel('all_video_Data.xlsx')  # Replace with your video data file path
+# Load video data, already typed when the dashboard loaded a channel this session
+if 'all_video_df' in st.session_state:
+    video_data = st.session_state.all_video_df
+else:
+    video_data = apply_video_schema(pd.read_excel('all_vids_info.xlsx'))
 
 # Get the suggested date
 suggested_date = suggest_next_publish_date(video_data)
@@ -56,7 +60,7 @@ st.markdown(f"""
         text-align: center;
     }}
 </style>
-<div class="suggested-date">Suggested next publishing date: {suggested_date.strftime('%Y-%m-%d %H:%M:%S')}</div>
+<div class="suggested-date">Suggested next publishing date: {suggested_date.strftime(DISPLAY_DATE_FORMAT)}</div>
 """, unsafe_allow_html=True)
 
 # Input fields
@@ -67,12 +71,12 @@ schedule_time = st.time_input("Schedule Time")
 
 if st.button("Schedule Video"):
     # Append to DataFrame and save back to Excel
-    df = df.append({
+    df = pd.concat([df, pd.DataFrame([{
         "title": video_title,
         "description": video_description,
         "date": schedule_date,
         "time": schedule_time
-    }, ignore_index=True)
+    }])], ignore_index=True)
     df.to_excel(EXCEL_DB, index=False)
     st.success("Video scheduled!")
 
@@ -0,0 +1,202 @@
+import re
+
+import pandas as pd
+import streamlit as st
+import plotly.express as px
+from streamlit_extras.chart_container import chart_container
+
+from channelSync import loadChannels, storeVersion
+from quotaScheduler import QuotaExceeded
+from video_query import VideoQueryEngine
+from video_schema import for_plotting
+from googleapiclient.errors import HttpError
+
+
+# Days of uploads the posting frequency is measured over
+RECENT_DAYS = 90
+
+
+########################################################################################################################
+#                                       FUNCTIONS
+########################################################################################################################
+@st.cache_data(max_entries=4)
+def download_channels(api_key, channel_ids, store_versions, sync=False):
+    # stored channels are read without the API; the rest are resolved 50 IDs per call and
+    # synced concurrently. store_versions keys the cache on the stores' modification times
+    return loadChannels(api_key, channel_ids, sync=sync)
+
+
+@st.cache_resource(max_entries=4)
+def load_query_engine(channel_ids, synced_at, _video_data):
+    """Builds the date and top-N query engine once per combined dataset."""
+    return VideoQueryEngine(_video_data)
+
+
+def parse_channel_ids(text):
+    """Channel IDs separated by commas, spaces or new lines, duplicates dropped."""
+    return tuple(dict.fromkeys(channel_id for channel_id in re.split(r"[\s,]+", text) if channel_id))
+
+
+def channel_summary(channel_details, video_data):
+    """One row per channel with its channel statistics and those of the selected videos."""
+    views = for_plotting(video_data['view_count'])
+    likes = for_plotting(video_data['like_count'])
+    recent = video_data['published_date'] >= video_data['published_date'].max() - pd.Timedelta(days=RECENT_DAYS)
+
+    per_channel = pd.DataFrame({'channel_id': video_data['channel_id'].astype(str),
+                                'views': views, 'likes': likes, 'recent': recent}) \
+        .groupby('channel_id') \
+        .agg(videos=('views', 'size'),
+             video_views=('views', 'sum'),
+             median_views=('views', 'median'),
+             likes=('likes', 'sum'),
+             recent_uploads=('recent', 'sum'))
+
+    summary = pd.DataFrame([{'channel_id': channel_id,
+                             'channel': details['title'],
+                             # channels can hide their subscriber count
+                             'subscribers': pd.NA if details['subscriberCount'] is None
+                             else int(details['subscriberCount']),
+                             'channel_views': int(details['viewCount'])}
+                            for channel_id, details in channel_details.items()])
+    summary['subscribers'] = summary['subscribers'].astype('Int64')
+    summary = summary.join(per_channel, on='channel_id')
+
+    summary['like_to_view_ratio'] = summary['likes'] / summary['video_views']
+    summary['uploads_per_week'] = summary['recent_uploads'] / (RECENT_DAYS / 7)
+    return summary.drop(columns=['likes', 'recent_uploads']).fillna({'videos': 0})
+
+
+########################################################################################################################
+#                                       PAGE CONFIGURATION
+########################################################################################################################
+st.set_page_config(page_title="Channel Comparison",
+                   page_icon="📊",
+                   layout="wide")
+
+st.title("Channel Comparison")
+
+########################################################################################################################
+#                                       SIDE BAR CONFIGURATION
+########################################################################################################################
+st.sidebar.title("Settings")
+
+if 'API_KEY' not in st.session_state:
+    st.session_state.API_KEY = ""
+if 'COMPARISON_CHANNEL_IDS' not in st.session_state:
+    st.session_state.COMPARISON_CHANNEL_IDS = st.session_state.get('CHANNEL_ID', "")
+
+st.session_state.API_KEY = st.sidebar.text_input("Enter your YouTube API Key", st.session_state.API_KEY,
+                                                 type="password")
+st.session_state.COMPARISON_CHANNEL_IDS = st.sidebar.text_area("Enter the YouTube Channel IDs to compare",
+                                                               st.session_state.COMPARISON_CHANNEL_IDS,
+                                                               help="One per line or separated by commas")
+channel_ids = parse_channel_ids(st.session_state.COMPARISON_CHANNEL_IDS)
+
+if not st.session_state.API_KEY or not channel_ids:
+    st.warning("Please enter your API Key and at least one Channel ID.")
+    st.stop()
+
+# Data Refresh Button
+refresh_button = st.sidebar.button("Refresh Data")
+
+try:
+    if refresh_button:
+        # drop the cached result so every channel is synced again
+        download_channels.clear()
+
+    with st.spinner(f"Loading {len(channel_ids)} channels..."):
+        channel_details, all_video_data, failed = download_channels(st.session_state.API_KEY, channel_ids,
+                                                                    tuple(storeVersion(channel_id)
+                                                                          for channel_id in channel_ids),
+                                                                    sync=refresh_button)
+
+except QuotaExceeded as error:
+    st.error(f"{error} Please try again after the quota resets at midnight Pacific time.")
+    st.stop()
+except HttpError as error:
+    st.error(f"The YouTube API returned an error: {error.reason}")
+    st.stop()
+
+for channel_id, message in failed.items():
+    st.sidebar.warning(f"{channel_id}: {message}")
+
+if not channel_details:
+    st.warning("None of the channels could be loaded. Please check the Channel IDs.")
+    st.stop()
+
+# Data Filters for fine-tuned data selection
+st.sidebar.title("Data Filters")
+
+num_videos = st.sidebar.slider("Select Number of Top Videos to Display:", 1, 50, 10)
+
+start_date = st.sidebar.date_input("Select Start Date", all_video_data['published_date'].min().date())
+end_date = st.sidebar.date_input("Select End Date", all_video_data['published_date'].max().date())
+
+if start_date > end_date:
+    st.sidebar.warning("Start date should be earlier than end date.")
+    st.stop()
+
+# published_date is in UTC; the end date includes the whole day
+date_range_start = pd.Timestamp(start_date, tz='UTC')
+date_range_end = pd.Timestamp(end_date, tz='UTC') + pd.Timedelta(days=1)
+
+query_engine = load_query_engine(tuple(channel_details), all_video_data.attrs.get('synced_at'), all_video_data)
+filtered_data = all_video_data.iloc[query_engine.select(date_range_start, date_range_end)]
+
+########################################################################################################################
+#                                       CHANNEL SUMMARY AREA
+########################################################################################################################
+st.header("Channel Summary", divider="green")
+
+summary = channel_summary(channel_details, filtered_data)
+st.dataframe(summary.drop(columns=['channel_id']), hide_index=True, use_container_width=True,
+             column_config={'like_to_view_ratio': st.column_config.NumberColumn("like_to_view_ratio",
+                                                                                format="%.4f"),
+                            'uploads_per_week': st.column_config.NumberColumn("uploads_per_week",
+                                                                              format="%.1f")})
+
+col1, col2 = st.columns(2)
+
+with col1:
+    st.subheader("Subscribers")
+    fig = px.bar(for_plotting(summary[['channel', 'subscribers']]), x='channel', y='subscribers')
+    fig.update_layout(xaxis_title="Channel", yaxis_title="Subscribers")
+    fig.update_traces(marker_color='green')
+    st.plotly_chart(fig, use_container_width=True)
+
+with col2:
+    st.subheader("Views per Video")
+    fig = px.box(for_plotting(filtered_data[['channel_title', 'view_count']]), x='channel_title', y='view_count',
+                 log_y=True)
+    fig.update_layout(xaxis_title="Channel", yaxis_title="View Count")
+    fig.update_traces(marker_color='orange')
+    st.plotly_chart(fig, use_container_width=True)
+
+########################################################################################################################
+#                                       GROWTH & TOP VIDEOS AREA
+########################################################################################################################
+st.subheader("Monthly Views of New Uploads", divider="green")
+
+monthly_views = for_plotting(filtered_data[['channel_title', 'view_count']]) \
+    .assign(month=filtered_data['published_date'].dt.tz_localize(None).dt.to_period('M').dt.to_timestamp()) \
+    .groupby(['channel_title', 'month'], observed=True)['view_count'].sum() \
+    .reset_index()
+
+fig = px.line(monthly_views, x='month', y='view_count', color='channel_title', markers=True)
+fig.update_layout(xaxis_title="Published Month",
+                  yaxis_title="Views",
+                  legend_title="Channel",
+                  template="plotly_dark")
+st.plotly_chart(fig, use_container_width=True)
+
+st.subheader(f"Top {num_videos} Videos Across Channels", divider="green")
+
+top_views_df = all_video_data.iloc[query_engine.top('view_count', num_videos, date_range_start, date_range_end)]
+with chart_container(top_views_df):
+    fig = px.bar(for_plotting(top_views_df[['title', 'channel_title', 'view_count']]),
+                 x='title', y='view_count', color='channel_title')
+    fig.update_layout(xaxis_title="Video Title",
+                      yaxis_title="View Count",
+                      legend_title="Channel")
+    st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,211 @@
+import datetime
+import json
+import os
+import random
+import threading
+import time
+import urllib.parse
+from zoneinfo import ZoneInfo
+
+import httplib2
+import pandas as pd
+from googleapiclient.errors import HttpError
+
+from youtubeClient import executeRequest
+
+# Request priorities, lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Quota units charged per call (https://developers.google.com/youtube/v3/determine_quota_cost)
+ENDPOINT_COST = {
+    "channels": 1,
+    "playlistItems": 1,
+    "videos": 1,
+    "commentThreads": 1,
+    "comments": 1,
+    "search": 100,
+}
+DEFAULT_COST = 1
+
+# Units available per API key and quota day. Usage is counted per process, so processes
+# sharing a key (dashboard and ingest worker) should each be given their share
+DAILY_QUOTA = int(os.environ.get("YOUTUBE_DAILY_QUOTA", 10000))
+
+# Share of the daily quota that background requests are not allowed to spend
+BACKGROUND_RESERVE = 0.2
+
+# Requests allowed in flight at once across all threads
+MAX_IN_FLIGHT = int(os.environ.get("YOUTUBE_MAX_IN_FLIGHT", 8))
+
+MAX_RETRIES = 5
+BASE_DELAY = 1.0
+MAX_DELAY = 32.0
+
+RETRY_STATUSES = {500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+QUOTA_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+
+# Connection failures (DNS, refused, reset, timeouts) re-raised once retries run out
+TRANSPORT_ERRORS = (httplib2.HttpLib2Error, OSError)
+
+# The YouTube quota resets at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+
+class QuotaExceeded(Exception):
+    """Raised when an API key has no quota left for the request."""
+
+
+_condition = threading.Condition()
+_in_flight = 0
+_waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+
+_quota_day = None
+_used_units = {}  # api key -> units spent today
+_exhausted_keys = set()
+_usage = {}  # (api key, endpoint) -> counters
+
+
+def _quotaDay():
+    return datetime.datetime.now(QUOTA_TIMEZONE).date()
+
+
+def _resetIfNewDay():
+    global _quota_day
+
+    today = _quotaDay()
+    if _quota_day != today:
+        _quota_day = today
+        _used_units.clear()
+        _exhausted_keys.clear()
+
+
+def _endpoint(request):
+    # methodId looks like "youtube.videos.list"
+    return request.methodId.split(".")[1]
+
+
+def _apiKey(request):
+    params = urllib.parse.parse_qs(urllib.parse.urlparse(request.uri).query)
+    return params.get("key", [""])[0]
+
+
+def _errorReason(error):
+    try:
+        return json.loads(error.content)["error"]["errors"][0]["reason"]
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+
+def _record(api_key, endpoint, **values):
+    counters = _usage.setdefault((api_key, endpoint),
+                                 {"calls": 0, "units": 0, "retries": 0, "errors": 0})
+    for name, value in values.items():
+        counters[name] += value
+
+
+def _acquire(priority):
+    """Waits for a free request slot, letting interactive requests go first."""
+    global _in_flight
+
+    with _condition:
+        _waiting[priority] += 1
+        try:
+            _condition.wait_for(lambda: _in_flight < MAX_IN_FLIGHT and
+                                not any(_waiting[other] for other in _waiting if other < priority))
+        finally:
+            _waiting[priority] -= 1
+        _in_flight += 1
+
+
+def _release():
+    global _in_flight
+
+    with _condition:
+        _in_flight -= 1
+        _condition.notify_all()
+
+
+def _charge(api_key, endpoint, priority):
+    """Takes the cost of one call out of the key's budget or raises QuotaExceeded."""
+    cost = ENDPOINT_COST.get(endpoint, DEFAULT_COST)
+    limit = DAILY_QUOTA if priority == INTERACTIVE else DAILY_QUOTA * (1 - BACKGROUND_RESERVE)
+
+    with _condition:
+        _resetIfNewDay()
+        if api_key in _exhausted_keys:
+            raise QuotaExceeded("The YouTube API quota for this key is used up for today.")
+        if _used_units.get(api_key, 0) + cost > limit:
+            raise QuotaExceeded(f"Request to {endpoint} would exceed the daily budget "
+                                f"of {int(limit)} units for this key.")
+        _used_units[api_key] = _used_units.get(api_key, 0) + cost
+        _record(api_key, endpoint, calls=1, units=cost)
+
+
+def _backoff(attempt):
+    # full jitter keeps concurrent workers from retrying in lockstep
+    time.sleep(random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt)))
+
+
+def scheduledExecute(request, priority=INTERACTIVE):
+    """Executes an API request within the key's quota budget, retrying transient failures."""
+    api_key = _apiKey(request)
+    endpoint = _endpoint(request)
+
+    for attempt in range(MAX_RETRIES + 1):
+        _charge(api_key, endpoint, priority)
+
+        _acquire(priority)
+        try:
+            return executeRequest(request)
+        except HttpError as error:
+            status = error.resp.status
+            reason = _errorReason(error)
+
+            if status == 304:
+                # not modified is an answer, not a failure
+                raise
+
+            with _condition:
+                _record(api_key, endpoint, errors=1)
+
+                if reason in QUOTA_REASONS:
+                    _exhausted_keys.add(api_key)
+                    raise QuotaExceeded("The YouTube API quota for this key is used up for today.") \
+                        from error
+
+            retryable = status in RETRY_STATUSES or \
+                (status in (403, 429) and reason in RATE_LIMIT_REASONS)
+            if not retryable or attempt == MAX_RETRIES:
+                raise
+        except TRANSPORT_ERRORS:
+            with _condition:
+                _record(api_key, endpoint, errors=1)
+            if attempt == MAX_RETRIES:
+                raise
+        finally:
+            _release()
+
+        with _condition:
+            _record(api_key, endpoint, retries=1)
+        _backoff(attempt)
+
+
+def remainingQuota(api_key):
+    with _condition:
+        _resetIfNewDay()
+        if api_key in _exhausted_keys:
+            return 0
+        return DAILY_QUOTA - _used_units.get(api_key, 0)
+
+
+def quotaReport():
+    """Returns quota units, calls, retries and errors per API key and endpoint for this session."""
+    with _condition:
+        rows = [{"api_key": "..." + api_key[-4:], "endpoint": endpoint, **counters}
+                for (api_key, endpoint), counters in _usage.items()]
+
+    columns = ["api_key", "endpoint", "calls", "units", "retries", "errors"]
+    return pd.DataFrame(rows, columns=columns).sort_values(by="units", ascending=False) \
+                                              .reset_index(drop=True)
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+
+from googleapiclient.errors import HttpError
+
+from quotaScheduler import scheduledExecute, INTERACTIVE
+
+# Directory holding one JSON file per cached response
+CACHE_DIR = os.path.join(".cache", "api")
+
+# Total size of cached responses before least recently used entries are evicted
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+# Seconds a response is served without asking the API again, per endpoint
+ENDPOINT_TTL = {
+    "channels": 6 * 60 * 60,
+    "playlistItems": 10 * 60,
+    "videos": 30 * 60,
+    "commentThreads": 30 * 60,
+    "comments": 30 * 60,
+}
+DEFAULT_TTL = 15 * 60
+
+_lock = threading.Lock()
+_index = None  # cache key -> file size, least recently used first
+
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "revalidated": 0,
+    "evictions": 0,
+}
+
+
+def _endpoint(request):
+    # methodId looks like "youtube.playlistItems.list"
+    return request.methodId.split(".")[1]
+
+
+def _cacheKey(request):
+    """Builds the cache key from the endpoint and request parameters, leaving out the API key."""
+    parsed = urllib.parse.urlparse(request.uri)
+    params = sorted((name, value) for name, value in urllib.parse.parse_qsl(parsed.query)
+                    if name != "key")
+    raw = json.dumps([request.method, parsed.path, params])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _path(key):
+    return os.path.join(CACHE_DIR, key + ".json")
+
+
+def _loadIndex():
+    """Builds the LRU index from the files on disk, oldest access time first."""
+    global _index
+
+    if _index is None:
+        entries = []
+        if os.path.isdir(CACHE_DIR):
+            for entry in os.scandir(CACHE_DIR):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        _index = OrderedDict((key, size) for _, key, size in sorted(entries))
+    return _index
+
+
+def _read(key):
+    try:
+        with open(_path(key), "r", encoding="utf-8") as cache_file:
+            return json.load(cache_file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write(key, entry):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    data = json.dumps(entry).encode("utf-8")
+
+    # one temporary file per thread, identical requests can finish at the same time
+    temp_path = f"{_path(key)}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as cache_file:
+        cache_file.write(data)
+    os.replace(temp_path, _path(key))
+
+    with _lock:
+        index = _loadIndex()
+        index[key] = len(data)
+        index.move_to_end(key)
+        _evict(index)
+
+
+def _touch(key):
+    with _lock:
+        index = _loadIndex()
+        if key in index:
+            index.move_to_end(key)
+    try:
+        os.utime(_path(key))
+    except FileNotFoundError:
+        pass
+
+
+def _evict(index):
+    total = sum(index.values())
+    while total > MAX_CACHE_BYTES and len(index) > 1:
+        key, size = index.popitem(last=False)
+        total -= size
+        _stats["evictions"] += 1
+        try:
+            os.remove(_path(key))
+        except FileNotFoundError:
+            pass
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def cachedExecute(request, priority=INTERACTIVE, revalidate=False):
+    """Executes an API request through the disk cache.
+
+    Fresh entries are returned without a network call. Expired entries are revalidated
+    with If-None-Match, so an unchanged resource only costs a 304 response. Anything
+    that reaches the network goes through the quota scheduler at the given priority.
+
+    revalidate=True treats a cached entry as expired however fresh it is, for callers
+    that must see the current state (syncs and explicit refreshes).
+    """
+    ttl = ENDPOINT_TTL.get(_endpoint(request), DEFAULT_TTL)
+    if ttl <= 0:
+        return scheduledExecute(request, priority)
+
+    key = _cacheKey(request)
+    entry = _read(key)
+
+    if entry is not None and not revalidate and time.time() - entry["stored_at"] < ttl:
+        _count("hits")
+        _touch(key)
+        return entry["body"]
+
+    if entry is not None and entry.get("etag"):
+        request.headers["If-None-Match"] = entry["etag"]
+
+    response_headers = {}
+    request.add_response_callback(response_headers.update)
+
+    try:
+        body = scheduledExecute(request, priority)
+    except HttpError as error:
+        if entry is None or error.resp.status != 304:
+            raise
+        _count("revalidated")
+        body = entry["body"]
+    else:
+        _count("misses")
+
+    _write(key, {
+        "endpoint": _endpoint(request),
+        "etag": response_headers.get("etag") or (entry or {}).get("etag") or body.get("etag"),
+        "stored_at": time.time(),
+        "body": body,
+    })
+
+    return body
+
+
+def cacheStats():
+    """Returns hit/miss counters and the current size of the cache."""
+    with _lock:
+        stats = dict(_stats)
+        index = _loadIndex()
+        stats["entries"] = len(index)
+        stats["bytes"] = sum(index.values())
+    lookups = stats["hits"] + stats["misses"] + stats["revalidated"]
+    stats["hit_rate"] = (stats["hits"] + stats["revalidated"]) / lookups if lookups else 0.0
+    return stats
+
+
+def clearCache():
+    """Removes every cached response."""
+    global _index
+
+    with _lock:
+        for key in _loadIndex():
+            try:
+                os.remove(_path(key))
+            except FileNotFoundError:
+                pass
+        _index = None
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# SQLite file memoizing polarity per comment text
+SENTIMENT_CACHE = os.path.join(".cache", "sentiment.sqlite")
+
+# Uncached texts needed before scoring is spread over a process pool
+PARALLEL_MIN_TEXTS = 5000
+
+# Texts handed to a worker process at a time
+BATCH_SIZE = 2000
+
+# Hashes looked up per query, below SQLite's bound parameter limit
+LOOKUP_CHUNK = 900
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def sentiment_label(polarity):
+    # Classify the polarity of the text
+    if polarity > 0:
+        return 'Positive'
+    elif polarity == 0:
+        return 'Neutral'
+    else:
+        return 'Negative'
+
+
+def score_batch(texts):
+    """Scores a batch of texts with TextBlob; runs inside the worker processes."""
+    # TextBlob pulls in NLTK, so it is only imported once there is something to score
+    from textblob import TextBlob
+
+    return [TextBlob(text).sentiment.polarity for text in texts]
+
+
+def connect_cache(path=None):
+    path = path or SENTIMENT_CACHE
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute("CREATE TABLE IF NOT EXISTS sentiment (hash TEXT PRIMARY KEY, polarity REAL NOT NULL)")
+    return connection
+
+
+def cached_polarities(connection, hashes):
+    """Returns {hash: polarity} for the hashes already in the cache."""
+    found = {}
+    for i in range(0, len(hashes), LOOKUP_CHUNK):
+        chunk = hashes[i:i + LOOKUP_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        found.update(connection.execute(f"SELECT hash, polarity FROM sentiment WHERE hash IN ({placeholders})",
+                                        chunk))
+    return found
+
+
+def score_texts(texts, max_workers=None):
+    """Computes polarity for texts, in one process for small inputs and a process pool for large ones."""
+    texts = list(texts)
+    if len(texts) < PARALLEL_MIN_TEXTS or max_workers == 1:
+        return score_batch(texts)
+
+    batches = [texts[i:i + BATCH_SIZE] for i in range(0, len(texts), BATCH_SIZE)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return [polarity for batch in executor.map(score_batch, batches) for polarity in batch]
+
+
+def analyze_sentiment(texts, max_workers=None, use_cache=True):
+    """Scores comment texts and returns a DataFrame with a polarity and Sentiment label per text.
+
+    Each distinct text is scored once. Polarities are memoized in SENTIMENT_CACHE under a
+    hash of the text, so comments seen in an earlier run are not scored again. The
+    returned frame shares the index of texts when texts is a Series.
+    """
+    texts = pd.Series(texts, dtype=object).fillna("").astype(str)
+    unique_texts = texts.drop_duplicates()
+    hashes = [text_hash(text) for text in unique_texts]
+
+    polarities = {}
+    connection = connect_cache() if use_cache else None
+    try:
+        if connection is not None:
+            polarities.update(cached_polarities(connection, hashes))
+
+        missing = [(hash_, text) for hash_, text in zip(hashes, unique_texts) if hash_ not in polarities]
+        if missing:
+            scores = score_texts([text for _, text in missing], max_workers)
+            new_polarities = [(hash_, polarity) for (hash_, _), polarity in zip(missing, scores)]
+            polarities.update(new_polarities)
+
+            if connection is not None:
+                with connection:
+                    connection.executemany("INSERT OR REPLACE INTO sentiment (hash, polarity) VALUES (?, ?)",
+                                           new_polarities)
+    finally:
+        if connection is not None:
+            connection.close()
+
+    polarity_by_text = dict(zip(unique_texts, (polarities[hash_] for hash_ in hashes)))
+    polarity = texts.map(polarity_by_text).astype(float)
+
+    return pd.DataFrame({
+        'polarity': polarity,
+        'Sentiment': polarity.map(sentiment_label),
+    }, index=texts.index)
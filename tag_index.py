@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+
+def normalize_tag(tag):
+    return str(tag).strip().lower()
+
+
+class TagIndex:
+    """Inverted index from normalized tags to the row positions of the videos using them.
+
+    Postings are stored CSR style: all positions sorted by tag in one int32 array, with
+    offsets marking where each tag's run starts. Tags are kept sorted, so every tag with
+    a given prefix is one contiguous range found with searchsorted.
+
+    Queries combine terms with set operations on boolean row masks:
+
+        python, tutorial     videos tagged python AND tutorial
+        python|java          python OR java
+        python, -shorts      python AND NOT shorts
+        react*               any tag starting with "react"
+
+    Terms are separated by commas and ANDed; alternatives inside a term are separated
+    by "|" and ORed. A leading "-" negates an alternative and a trailing "*" makes it
+    a prefix match. Matching ignores case and surrounding whitespace.
+    """
+
+    def __init__(self, tags):
+        tags = pd.Series(tags, dtype=object).reset_index(drop=True)
+        self.n_rows = len(tags)
+
+        exploded = tags.explode().dropna()
+        normalized = exploded.astype(str).str.strip().str.lower()
+        keep = (normalized != "").to_numpy()
+
+        codes, self.tags = pd.factorize(normalized[keep], sort=True)
+        self.tags = np.asarray(self.tags, dtype=object)
+        positions = exploded.index.to_numpy()[keep].astype(np.int32)
+
+        # group positions by tag; a video listing a tag twice is stored once
+        order = np.lexsort((positions, codes))
+        codes, positions = codes[order], positions[order]
+        unique = np.ones(len(codes), dtype=bool)
+        unique[1:] = (codes[1:] != codes[:-1]) | (positions[1:] != positions[:-1])
+        codes, self.positions = codes[unique], positions[unique]
+
+        self.offsets = np.zeros(len(self.tags) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(self.tags)), out=self.offsets[1:])
+
+    def _tag_range(self, tag, prefix=False):
+        """Range of tag codes matching a normalized tag, or every tag with it as a prefix."""
+        start = np.searchsorted(self.tags, tag, side="left")
+        if prefix:
+            end = np.searchsorted(self.tags, tag + "\U0010ffff", side="left")
+        else:
+            end = start + 1 if start < len(self.tags) and self.tags[start] == tag else start
+        return start, end
+
+    def _postings(self, tag, prefix=False):
+        # a prefix spanning several tags can list a video more than once
+        start, end = self._tag_range(normalize_tag(tag), prefix)
+        return self.positions[self.offsets[start]:self.offsets[end]]
+
+    def positions_for(self, tag, prefix=False):
+        """Sorted row positions of the videos with a tag (or a tag starting with it)."""
+        positions = self._postings(tag, prefix)
+        return np.unique(positions) if prefix else positions
+
+    def _term_mask(self, term):
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for alternative in term.split("|"):
+            alternative = alternative.strip()
+            negate = alternative.startswith("-")
+            alternative = alternative.lstrip("-").strip()
+            prefix = alternative.endswith("*")
+            alternative = alternative.rstrip("*")
+            if not alternative:
+                continue
+
+            matched = np.zeros(self.n_rows, dtype=bool)
+            matched[self._postings(alternative, prefix)] = True
+            mask |= ~matched if negate else matched
+        return mask
+
+    def mask(self, query):
+        """Boolean mask over the indexed rows of the videos matching a query."""
+        mask = np.ones(self.n_rows, dtype=bool)
+        for term in query.split(","):
+            if term.strip().strip("|-*"):
+                mask &= self._term_mask(term)
+        return mask
+
+    def query(self, query):
+        """Row positions of the videos matching a query, ready for DataFrame.iloc."""
+        return np.flatnonzero(self.mask(query))
@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Share of the query's trigrams a title needs to be returned at all
+MIN_SHARED_TRIGRAMS = 0.4
+
+# Queries whose ranked results are kept for paging
+CACHED_QUERIES = 32
+
+
+def normalize_title(title):
+    return " ".join(str(title or "").lower().split())
+
+
+def trigram_codes(text):
+    """Trigrams of a normalized text padded with spaces, packed into int64 codes."""
+    padded = f"  {text} "
+    code_points = np.frombuffer(padded.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+    if len(code_points) < 3:
+        return np.empty(0, dtype=np.int64)
+    # unicode code points fit in 21 bits, so three of them fit in one int64
+    return (code_points[:-2] << 42) | (code_points[1:-1] << 21) | code_points[2:]
+
+
+class TitleIndex:
+    """Trigram index over video titles for ranked, typo-tolerant search.
+
+    Each title is split into character trigrams, and the index maps every trigram to
+    the positions of the titles containing it (CSR style, trigrams sorted for
+    searchsorted). A query scores titles by the Dice overlap of their trigram sets, so
+    a missing or swapped letter only costs a few trigrams. Titles containing the query
+    verbatim rank first, then by score, then in their original order (newest first).
+
+    Ranked results are kept per query, so later pages are slices of the same result.
+    """
+
+    def __init__(self, titles):
+        self.titles = [normalize_title(title) for title in titles]
+
+        # trigram codes of all padded titles at once, dropping those that straddle two titles
+        padded = [f"  {title} " for title in self.titles]
+        lengths = np.fromiter((len(text) for text in padded), dtype=np.int64, count=len(padded))
+        code_points = np.frombuffer("".join(padded).encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+        ends = np.cumsum(lengths)
+        owners = np.repeat(np.arange(len(padded), dtype=np.int32), lengths)[:max(len(code_points) - 2, 0)]
+        starts = np.arange(len(owners))
+        within = starts + 2 < ends[owners]
+        codes = (code_points[:-2] << 42 | code_points[1:-1] << 21 | code_points[2:])[within]
+        positions = owners[within]
+
+        # sort by trigram, then title, and keep each (trigram, title) pair once
+        order = np.lexsort((positions, codes))
+        codes, positions = codes[order], positions[order]
+        unique = np.ones(len(codes), dtype=bool)
+        unique[1:] = (codes[1:] != codes[:-1]) | (positions[1:] != positions[:-1])
+        codes, self.positions = codes[unique], positions[unique]
+        self.trigram_counts = np.bincount(self.positions, minlength=len(self.titles))
+
+        self.trigrams, starts = np.unique(codes, return_index=True)
+        self.offsets = np.append(starts, len(codes)).astype(np.int64)
+
+        self._lock = threading.Lock()
+        self._results = OrderedDict()  # query -> ranked positions, least recently used first
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _shared(self, codes):
+        """How many of the given trigrams each title contains."""
+        slots = np.searchsorted(self.trigrams, codes)
+        found = slots < len(self.trigrams)
+        found[found] = self.trigrams[slots[found]] == codes[found]
+
+        postings = [self.positions[self.offsets[slot]:self.offsets[slot + 1]] for slot in slots[found]]
+        if not postings:
+            return np.zeros(len(self.titles), dtype=np.int64)
+        return np.bincount(np.concatenate(postings), minlength=len(self.titles))
+
+    def _rank(self, query):
+        if not query:
+            return np.arange(len(self.titles))
+
+        query_codes = np.unique(trigram_codes(query))
+        shared = self._shared(query_codes)
+        similar = shared >= max(1, int(np.ceil(len(query_codes) * MIN_SHARED_TRIGRAMS)))
+
+        # a title containing the query verbatim has every trigram inside it; shorter
+        # queries have none and are checked against every title
+        if len(query) >= 3:
+            inner = np.unique(trigram_codes(query)[2:-1])
+            possible = np.flatnonzero(self._shared(inner) == len(inner))
+        else:
+            possible = range(len(self.titles))
+        contains_query = np.zeros(len(self.titles), dtype=bool)
+        contains_query[[position for position in possible if query in self.titles[position]]] = True
+
+        candidates = np.flatnonzero(similar | contains_query)
+        score = 2 * shared[candidates] / (len(query_codes) + self.trigram_counts[candidates])
+        verbatim = contains_query[candidates]
+
+        # lexsort sorts by the last key first
+        return candidates[np.lexsort((candidates, -score, ~verbatim))]
+
+    def search(self, query, offset=0, limit=10):
+        """Returns (positions, total) for one page of the ranked matches of a query.
+
+        positions index into the titles the index was built from; an empty query
+        matches every title in its original order.
+        """
+        query = normalize_title(query)
+
+        with self._lock:
+            ranked = self._results.get(query)
+            if ranked is not None:
+                self._results.move_to_end(query)
+
+        if ranked is None:
+            ranked = self._rank(query)
+            with self._lock:
+                self._results[query] = ranked
+                while len(self._results) > CACHED_QUERIES:
+                    self._results.popitem(last=False)
+
+        return ranked[offset:offset + limit], len(ranked)
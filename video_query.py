@@ -0,0 +1,115 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from tag_index import TagIndex
+
+# Filter states whose results are kept
+CACHED_QUERIES = 256
+
+
+def to_datetime64(timestamp):
+    """A bound as naive UTC datetime64[ns]; naive bounds are taken to be UTC already."""
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+    return timestamp.as_unit('ns').to_datetime64()
+
+
+class VideoQueryEngine:
+    """Answers the dashboard's date range, tag and top-N queries over one video frame.
+
+    Built once per dataset. Publish dates are kept sorted, so a date range is two
+    searchsorted calls and a slice of row positions. Top-N per metric runs
+    argpartition on the selected rows only, and every result is memoized per filter
+    state, so moving a slider back to an earlier value costs a dictionary lookup.
+
+    All results are row positions into the frame the engine was built from, for
+    DataFrame.iloc.
+    """
+
+    def __init__(self, video_data):
+        self.video_data = video_data
+        self.n_rows = len(video_data)
+
+        published = video_data['published_date']
+        if isinstance(published.dtype, pd.DatetimeTZDtype):
+            published = published.dt.tz_convert('UTC').dt.tz_localize(None)
+        dates = published.to_numpy(dtype='datetime64[ns]')
+
+        # NaT sorts first and falls outside every range
+        self.date_order = np.argsort(dates, kind='stable')
+        self.sorted_dates = dates[self.date_order]
+
+        self._metrics = {}
+        self._tag_index = None
+        self._lock = threading.Lock()
+        self._results = OrderedDict()  # filter state -> positions, least recently used first
+
+    def _memoized(self, key, compute):
+        with self._lock:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                return result
+
+        result = compute()
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > CACHED_QUERIES:
+                self._results.popitem(last=False)
+        return result
+
+    def _metric(self, column):
+        """A count column as float64 with missing values ranked last."""
+        values = self._metrics.get(column)
+        if values is None:
+            values = pd.to_numeric(self.video_data[column], errors='coerce').astype('float64').to_numpy()
+            values = np.where(np.isnan(values), -np.inf, values)
+            self._metrics[column] = values
+        return values
+
+    def tag_index(self):
+        if self._tag_index is None:
+            self._tag_index = TagIndex(self.video_data['tags'])
+        return self._tag_index
+
+    def select(self, start, end, tag_query=""):
+        """Positions of the videos published in [start, end) matching a tag query, in frame order."""
+        tag_query = tag_query.strip()
+
+        def compute():
+            low = np.searchsorted(self.sorted_dates, to_datetime64(start), side='left')
+            high = np.searchsorted(self.sorted_dates, to_datetime64(end), side='left')
+            positions = np.sort(self.date_order[low:high])
+
+            if tag_query:
+                positions = positions[self.tag_index().mask(tag_query)[positions]]
+            return positions
+
+        return self._memoized(("select", start, end, tag_query), compute)
+
+    def top(self, column, k, start, end, tag_query=""):
+        """Positions of the k selected videos with the highest values of a column, highest first."""
+        tag_query = tag_query.strip()
+
+        def compute():
+            positions = self.select(start, end, tag_query)
+            values = self._metric(column)[positions]
+            if k < len(positions):
+                # the k-th highest value; every larger value is kept and the videos tied with it
+                # are taken in frame order, so the cutoff matches a stable sort
+                cutoff = -np.partition(-values, k - 1)[k - 1]
+                above = np.flatnonzero(values > cutoff)
+                tied = np.flatnonzero(values == cutoff)[:k - len(above)]
+                candidates = np.concatenate((above, tied))
+            else:
+                candidates = np.arange(len(positions))
+
+            # ties keep frame order, like a stable sort would
+            ranked = candidates[np.lexsort((positions[candidates], -values[candidates]))]
+            return positions[ranked]
+
+        return self._memoized(("top", column, k, start, end, tag_query), compute)
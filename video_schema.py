@@ -0,0 +1,105 @@
+import ast
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+# Arrow backed strings when pyarrow is installed (Streamlit depends on it)
+STRING_DTYPE = "string[pyarrow]" if importlib.util.find_spec("pyarrow") is not None else "string"
+
+# Canonical dtypes of the video statistics frame. Views can pass 2**31, the other counts
+# cannot; ISO durations repeat a lot, and tags stay a list of strings per video.
+VIDEO_SCHEMA = {
+    'id': STRING_DTYPE,
+    'title': STRING_DTYPE,
+    'published_date': 'datetime64[ns, UTC]',
+    'tags': object,
+    'duration': 'category',
+    'view_count': 'Int64',
+    'like_count': 'Int32',
+    'favorite_count': 'Int32',
+    'comment_count': 'Int32',
+    'thumbnail': STRING_DTYPE,
+    'duration_minutes': 'float32',
+}
+
+COUNT_COLUMNS = ['view_count', 'like_count', 'favorite_count', 'comment_count']
+
+DISPLAY_DATE_FORMAT = '%Y-%m-%d %H:%M UTC'
+
+
+def parse_tags(tags):
+    """Returns tags as a list, also accepting the string form a list takes in Excel."""
+    if isinstance(tags, (list, tuple, np.ndarray)):
+        return list(tags)
+    if isinstance(tags, str) and tags.startswith('['):
+        try:
+            return list(ast.literal_eval(tags))
+        except (ValueError, SyntaxError):
+            return []
+    return []
+
+
+def apply_video_schema(frame):
+    """Returns a copy of a video frame with every known column cast to its canonical dtype.
+
+    Accepts raw API values (ISO dates, counts as strings), frames read back from Excel
+    and frames already in the schema, so older stores can be upgraded in place.
+    """
+    frame = frame.copy()
+
+    for column, dtype in VIDEO_SCHEMA.items():
+        if column not in frame:
+            continue
+        if column == 'published_date':
+            # naive values are the UTC times the API returned
+            frame[column] = pd.to_datetime(frame[column], utc=True).astype(dtype)
+        elif column in COUNT_COLUMNS:
+            frame[column] = pd.to_numeric(frame[column], errors='coerce').round().astype(dtype)
+        elif column == 'tags':
+            frame[column] = frame[column].map(parse_tags)
+        else:
+            frame[column] = frame[column].astype(dtype)
+
+    return frame
+
+
+def for_export(frame):
+    """Copy of a video frame Excel can store: naive UTC dates and plain strings."""
+    frame = frame.copy()
+    if 'published_date' in frame and isinstance(frame['published_date'].dtype, pd.DatetimeTZDtype):
+        frame['published_date'] = frame['published_date'].dt.tz_localize(None)
+    return frame
+
+
+def for_plotting(data):
+    """Copy of a frame or series with nullable numbers as float64 (NA as NaN) for Plotly."""
+    def plain(series):
+        if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_numeric_dtype(series):
+            return series.astype('float64')
+        if isinstance(series.dtype, pd.StringDtype):
+            return series.astype(object)
+        return series
+
+    if isinstance(data, pd.Series):
+        return plain(data)
+    return data.assign(**{column: plain(data[column]) for column in data.columns})
+
+
+def format_count(value):
+    return "n/a" if pd.isna(value) else "{:,}".format(int(value))
+
+
+def format_published(value):
+    return "n/a" if pd.isna(value) else pd.Timestamp(value).strftime(DISPLAY_DATE_FORMAT)
+
+
+def memory_report(before, after):
+    """Per column bytes of two versions of a frame, deep counting object values."""
+    report = pd.DataFrame({
+        'before': before.memory_usage(deep=True, index=False),
+        'after': after.memory_usage(deep=True, index=False),
+    })
+    report.loc['total'] = report.sum()
+    report['saved'] = 1 - report['after'] / report['before']
+    return report
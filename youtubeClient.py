@@ -0,0 +1,127 @@
+import json
+import os
+import threading
+import time
+
+import httplib2
+import googleapiclient.discovery
+from googleapiclient import discovery_cache
+
+API_SERVICE_NAME = "youtube"
+API_VERSION = "v3"
+
+# Seconds to wait on a socket before giving up on a request
+HTTP_TIMEOUT = 60
+
+# Optional API root override, e.g. a local fake server used by the benchmarks
+API_ENDPOINT = os.environ.get("YOUTUBE_API_ENDPOINT")
+
+_lock = threading.Lock()
+_discovery_document = None
+_services = {}
+_thread_state = threading.local()
+
+_stats = {
+    "services_built": 0,
+    "build_seconds": 0.0,
+    "transports_created": 0,
+    "requests": 0,
+    "connections_opened": 0,
+    "connect_seconds": 0.0,
+    "request_seconds": 0.0,
+}
+
+
+class TimedHttp(httplib2.Http):
+    """httplib2 transport that keeps connections alive and records connection timings."""
+
+    def _conn_request(self, conn, request_uri, method, body, headers):
+        is_new_connection = conn.sock is None
+        start = time.perf_counter()
+        if is_new_connection:
+            conn.connect()
+            _record(connections_opened=1, connect_seconds=time.perf_counter() - start)
+
+        response = super()._conn_request(conn, request_uri, method, body, headers)
+        _record(requests=1, request_seconds=time.perf_counter() - start)
+        return response
+
+
+def _record(**values):
+    with _lock:
+        for name, value in values.items():
+            _stats[name] += value
+
+
+def _get_discovery_document():
+    """Loads and parses the bundled YouTube discovery document once per process."""
+    global _discovery_document
+
+    with _lock:
+        if _discovery_document is None:
+            document = discovery_cache.get_static_doc(API_SERVICE_NAME, API_VERSION)
+            _discovery_document = json.loads(document)
+        return _discovery_document
+
+
+def getHttp():
+    """Returns the keep-alive transport owned by the calling thread."""
+    http = getattr(_thread_state, "http", None)
+    if http is None:
+        http = TimedHttp(timeout=HTTP_TIMEOUT)
+        # Same redirect handling as googleapiclient.http.build_http
+        http.redirect_codes = http.redirect_codes - {308}
+        _thread_state.http = http
+        _record(transports_created=1)
+    return http
+
+
+def getYoutubeClient(api_key):
+    """Returns the YouTube service for an API key, building it only on first use.
+
+    The service object is shared between threads; requests built from it should be
+    run with executeRequest so each thread uses its own connection.
+    """
+    with _lock:
+        service = _services.get(api_key)
+    if service is not None:
+        return service
+
+    document = _get_discovery_document()
+    client_options = {"api_endpoint": API_ENDPOINT} if API_ENDPOINT else None
+
+    start = time.perf_counter()
+    service = googleapiclient.discovery.build_from_document(document,
+                                                            developerKey=api_key,
+                                                            http=getHttp(),
+                                                            client_options=client_options)
+    build_seconds = time.perf_counter() - start
+
+    with _lock:
+        # another thread may have finished building first
+        if api_key not in _services:
+            _services[api_key] = service
+            _stats["services_built"] += 1
+            _stats["build_seconds"] += build_seconds
+        return _services[api_key]
+
+
+def executeRequest(request):
+    """Executes an API request on the calling thread's transport."""
+    return request.execute(http=getHttp())
+
+
+def clientStats():
+    """Returns a snapshot of client build and connection timings."""
+    with _lock:
+        stats = dict(_stats)
+    stats["connections_reused"] = stats["requests"] - stats["connections_opened"]
+    return stats
+
+
+def resetClients():
+    """Drops all cached services and timings (used when an API key is revoked)."""
+    with _lock:
+        _services.clear()
+        for name in _stats:
+            _stats[name] = 0.0 if name.endswith("seconds") else 0